@@ -0,0 +1,73 @@
+# bench_planner.py
+# Meal-plan generation time against catalog size.
+#   python benchmarks/bench_planner.py [--sizes 50 1000 ...] [--repeat 20]
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nutrition_core.plans import MealPlanner  # noqa: E402
+from nutrition_core.store import NutritionStore  # noqa: E402
+
+CATEGORIES = ["fruit", "vegetable", "staple", "protein", "dairy", "fast food", "sweets", "drinks"]
+# (calories, protein) ranges per 100g, roughly like the real catalog
+RANGES = {
+    "fruit": ((30, 160), (0.3, 2.0)),
+    "vegetable": ((15, 90), (0.7, 5.5)),
+    "staple": ((110, 390), (2.5, 17.0)),
+    "protein": ((75, 350), (8.0, 27.0)),
+    "dairy": ((40, 400), (3.0, 25.0)),
+    "fast food": ((250, 320), (3.0, 17.0)),
+    "sweets": ((200, 550), (3.0, 8.0)),
+    "drinks": ((0, 5), (0.0, 0.2)),
+}
+
+
+def synthetic_store(n_foods: int, seed: int = 0) -> NutritionStore:
+    rng = np.random.default_rng(seed)
+    categories = [CATEGORIES[i % len(CATEGORIES)] for i in range(n_foods)]
+    cal = np.empty(n_foods)
+    pro = np.empty(n_foods)
+    for category, ((c_lo, c_hi), (p_lo, p_hi)) in RANGES.items():
+        rows = [i for i, c in enumerate(categories) if c == category]
+        cal[rows] = rng.uniform(c_lo, c_hi, len(rows))
+        pro[rows] = rng.uniform(p_lo, p_hi, len(rows))
+    names = [f"food {i}" for i in range(n_foods)]
+    return NutritionStore(names, ["calories", "protein"], np.vstack([cal, pro]),
+                          text={"category": categories})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1_000, 10_000, 100_000, 500_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    targets = [(1500, 60), (2000, 90), (2561, 84), (3000, 140)]
+    print(f"{'foods':>8} {'setup ms':>9} {'median ms':>10} {'max ms':>8} {'kcal err':>9}")
+    for size in args.sizes:
+        store = synthetic_store(size)
+        start = time.perf_counter()
+        planner = MealPlanner(store)
+        setup = time.perf_counter() - start
+
+        timings, errors = [], []
+        for i in range(args.repeat):
+            target_cals, protein_target = targets[i % len(targets)]
+            start = time.perf_counter()
+            plan = planner.plan(target_cals, protein_target)
+            timings.append(time.perf_counter() - start)
+            items = [item for items in plan.values() for item in items]
+            totals = store.totals(store.ids_of([fk for fk, _ in items]), [g for _, g in items])
+            errors.append(abs(totals["calories"] - target_cals))
+        print(f"{size:>8} {setup * 1e3:>9.1f} {statistics.median(timings) * 1e3:>10.2f} "
+              f"{max(timings) * 1e3:>8.2f} {statistics.median(errors):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# import_time.py
+# Import-time budget for the headless core. Each sample runs in a fresh
+# interpreter so nothing is cached; interpreter startup is not counted.
+#   python benchmarks/import_time.py [--budget-ms 5] [--runs 15]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be loaded by importing the core
+HEAVY = ["streamlit", "matplotlib", "numpy", "pandas"]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import nutrition_core
+from nutrition_core import daily_targets, advice_for, plan_feedback
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(elapsed, ",".join(heavy))
+"""
+
+
+def sample() -> tuple:
+    out = subprocess.run([sys.executable, "-c", PROBE.format(heavy=HEAVY)], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), out[1].split(",") if len(out) > 1 else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=5.0)
+    parser.add_argument("--runs", type=int, default=15)
+    args = parser.parse_args()
+
+    timings, heavy = [], set()
+    for _ in range(args.runs):
+        elapsed, loaded = sample()
+        timings.append(elapsed * 1e3)
+        heavy.update(loaded)
+    median = statistics.median(timings)
+    print(f"import nutrition_core: median {median:.2f} ms, min {min(timings):.2f} ms "
+          f"over {args.runs} runs (budget {args.budget_ms:.1f} ms)")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules loaded at import: {', '.join(sorted(heavy))}")
+        failed = True
+    if median > args.budget_ms:
+        print("FAIL: over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# loadtest_server.py
+# Latency percentiles and throughput of the JSON API (nutrition_core.server).
+# Starts a server on a free port unless --url points at a running one.
+#   python benchmarks/loadtest_server.py [--concurrency 32] [--duration 10] [--endpoints lookup plan ...]
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILE = {"dob": "1990-05-20", "gender": "female", "weight": 64, "height": 165, "goal": "lose",
+           "activity": "moderate"}
+# Request bodies cycled per endpoint
+PAYLOADS = {
+    "lookup": [{"food": f, "grams": g} for f, g in
+               [("chicken", 150), ("rice", 200), ("banan", 120), ("yoghurt", 170), ("oats", 60)]],
+    "targets": [PROFILE, dict(PROFILE, gender="male", weight=82, height=181, goal="gain", activity="active")],
+    "plan": [{"target_cals": c, "protein_target": p} for c, p in [(1800, 90), (2200, 110), (2600, 150)]]
+            + [dict(PROFILE, exclude=["milk"], conditions=["diabetes"])],
+    "advice": [{"conditions": ["diabetes", "high_bp"], "goal": "lose", "days_left": 60}, {"conditions": ["low_bp"]}],
+    "batch": [{"requests": [dict(p, endpoint="lookup") for p in
+                            [{"food": "apple", "grams": 150}, {"food": "egg", "grams": 100},
+                             {"food": "bread", "grams": 80}, {"food": "milk", "grams": 250}] * 5]}],
+}
+
+
+def start_server():
+    process = subprocess.Popen([sys.executable, "-m", "nutrition_core.server", "--port", "0"], cwd=ROOT,
+                               stderr=subprocess.PIPE, text=True)
+    line = process.stderr.readline()
+    if "http://" not in line:
+        process.kill()
+        raise SystemExit(f"server failed to start: {line}{process.stderr.read()}")
+    return process, line.rsplit(" ", 1)[-1].strip()
+
+
+async def _request(reader, writer, host: str, path: str, body: bytes):
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        key, _, value = line.decode("latin-1").partition(":")
+        if key.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host: str, port: int, work, deadline: float, latencies: dict, failures: dict):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for endpoint, body in work:
+            if time.perf_counter() >= deadline:
+                break
+            start = time.perf_counter()
+            status = await _request(reader, writer, host, "/" + endpoint, body)
+            latencies[endpoint].append(time.perf_counter() - start)
+            if status != 200:
+                failures[endpoint] += 1
+    finally:
+        writer.close()
+
+
+def _work(endpoints, offset: int):
+    # Endless round-robin over (endpoint, encoded body), staggered per client
+    bodies = [(e, json.dumps(p).encode()) for e in endpoints for p in PAYLOADS[e]]
+    i = offset
+    while True:
+        yield bodies[i % len(bodies)]
+        i += 1
+
+
+async def run(url: str, endpoints, concurrency: int, duration: float):
+    parts = urlsplit(url)
+    latencies = {e: [] for e in endpoints}
+    failures = {e: 0 for e in endpoints}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client(parts.hostname, parts.port, _work(endpoints, i), deadline, latencies, failures)
+                           for i in range(concurrency)))
+    return latencies, failures, time.perf_counter() - start
+
+
+def _pct(values, q: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the nutrition JSON API.")
+    parser.add_argument("--url", help="running server, e.g. http://127.0.0.1:8080 (default: start one)")
+    parser.add_argument("--concurrency", type=int, default=32, help="keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--endpoints", nargs="+", default=list(PAYLOADS), choices=list(PAYLOADS))
+    args = parser.parse_args()
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_server()
+    try:
+        latencies, failures, elapsed = asyncio.run(run(url, args.endpoints, args.concurrency, args.duration))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{url}: {args.concurrency} connections, {elapsed:.1f}s")
+    print(f"{'endpoint':>10} {'requests':>9} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for endpoint, values in latencies.items():
+        if values:
+            print(f"{endpoint:>10} {len(values):>9} {failures[endpoint]:>7} {_pct(values, 50) * 1e3:>8.2f} "
+                  f"{_pct(values, 99) * 1e3:>8.2f} {len(values) / elapsed:>8.0f}")
+    every = [v for values in latencies.values() for v in values]
+    if every:
+        print(f"{'all':>10} {total:>9} {sum(failures.values()):>7} {_pct(every, 50) * 1e3:>8.2f} "
+              f"{_pct(every, 99) * 1e3:>8.2f} {total / elapsed:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
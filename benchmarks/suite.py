@@ -0,0 +1,237 @@
+# suite.py
+# Benchmark suite: engine functions across catalog sizes plus full headless
+# Streamlit reruns (AppTest), written as JSON and compared with a baseline.
+#   python benchmarks/suite.py [--sizes 50 10000 500000] [--out results.json]
+#                              [--baseline baseline.json] [--threshold 0.25] [--save-baseline]
+# Exits 1 when any benchmark's median is slower than the baseline by more
+# than the threshold (and by at least --min-delta-ms, to ignore timer noise).
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_planner import synthetic_store  # noqa: E402
+from nutrition_core import charts  # noqa: E402
+from nutrition_core.advice import advice_for, condition_advice, plan_feedback, workouts_for  # noqa: E402
+from nutrition_core.lookup import Catalog, default_catalog  # noqa: E402
+from nutrition_core.targets import LOSE, activity_factors, calc_bmr, calculate_age, daily_targets  # noqa: E402
+from nutrition_core.trajectory import MAX_DAYS, project_weight, scenario_grid  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = [50, 1_000, 10_000, 100_000, 500_000]
+MIN_SAMPLE_S = 0.002    # inner loop grows until one sample takes at least this long
+
+
+def measure(fn, repeat: int, setup=None) -> dict:
+    # Per-call timings in ms; fast functions are looped so each sample is measurable.
+    # With a setup (e.g. clearing a cache) every sample is one call right after it.
+    number = 1
+    while setup is None:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= MIN_SAMPLE_S or number >= 1 << 16:
+            break
+        number *= 4
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1e3)
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples), "max_ms": max(samples),
+            "repeat": repeat, "number": number}
+
+
+# -------------------------------
+# Engine benchmarks
+def engine_benchmarks(sizes, repeat: int):
+    dob, today = date(1990, 5, 20), date(2026, 1, 1)
+    yield "targets.calc_bmr", None, measure(lambda: calc_bmr("Female", 64.0, 165.0, 35), repeat)
+    yield "targets.calculate_age", None, measure(lambda: calculate_age(dob, today), repeat)
+    yield "targets.daily_targets", None, measure(
+        lambda: daily_targets("Female", 64.0, 165.0, 35, LOSE, "Moderate (3-5 days/week)"), repeat)
+    # Ten years, every activity level x 9 calorie adjustments
+    grid = scenario_grid(list(activity_factors), range(-1000, 1, 125))
+    yield "trajectory.project_10y_45", None, measure(
+        lambda: project_weight("Female", 80.0, 165.0, 35, *grid, MAX_DAYS, goal_weight=70.0), repeat)
+    every = list(condition_advice)
+    yield "advice.render", None, measure(
+        lambda: (advice_for(every), workouts_for(LOSE), plan_feedback(1900, 80, 2000, 96)), repeat)
+
+    for size in sizes:
+        store = synthetic_store(size)
+        start = time.perf_counter()
+        catalog = Catalog(store)
+        catalog.index, catalog.planner
+        yield "catalog.build", size, {"median_ms": (time.perf_counter() - start) * 1e3, "repeat": 1, "number": 1}
+
+        name = f"food {size // 2}"
+        yield "lookup.estimate_from_serving", size, measure(lambda: catalog.estimate_from_serving(name, 150), repeat)
+        servings = [(f"food {i * 7 % size}", 50 + i) for i in range(100)]
+        yield "lookup.estimate_servings_100", size, measure(lambda: catalog.estimate_servings(servings), repeat)
+        yield "lookup.lookup_fuzzy", size, measure(lambda: catalog.lookup(f"fod {size // 3}", 100), repeat)
+        catalog.filter
+        yield "filters.query", size, measure(
+            lambda: catalog.filter.query(["diabetes", "high_bp"], max_calories=300, limit=20), repeat)
+        yield "plans.plan", size, measure(lambda: catalog.planner.plan(2200, 110), repeat)
+        plan = catalog.planner.plan(2200, 110)
+        yield "plans.summarize", size, measure(lambda: catalog.summarize(plan), repeat)
+        yield "plans.personal_plan_cached", size, measure(
+            lambda: catalog.personal_plan("Female", 64, 165, 35, LOSE, "Moderate (3-5 days/week)"), repeat)
+
+    # Charts don't depend on catalog size; caches are cleared so every sample renders
+    catalog = Catalog(synthetic_store(50))
+    food = catalog.lookup("food 3", 150)
+    summary = catalog.summarize(catalog.planner.plan(2200, 110))
+    yield "charts.food_spec", None, measure(lambda: charts.food_chart_spec(food), repeat, charts.clear_cache)
+    yield "charts.plan_spec", None, measure(lambda: charts.plan_chart_spec(summary), repeat, charts.clear_cache)
+    yield "charts.food_png", None, measure(lambda: charts.food_chart_image(food), max(3, repeat // 4),
+                                           charts.clear_cache)
+    yield "charts.plan_png", None, measure(lambda: charts.plan_chart_image(summary), max(3, repeat // 4),
+                                           charts.clear_cache)
+    yield "charts.food_png_cached", None, measure(lambda: charts.food_chart_image(food), repeat)
+
+    # A pasted day's log: 500 lines over the real catalog, parsed cold and then from the line cache
+    parser = default_catalog().meal_parser
+    foods = list(default_catalog().store.names)
+    amounts = ["2", "a", "150 g", "1/2 cup", "a glass of", "2 slices of", "3 oz", "a bowl of"]
+    log = "\n".join(", ".join(f"{amounts[(i + j) % len(amounts)]} {foods[(i * 7 + j * 3) % len(foods)]}"
+                              for j in range(1 + i % 3)) for i in range(500))
+    yield "meal_parser.evaluate_500_lines", None, measure(lambda: parser.evaluate(log), max(3, repeat // 4),
+                                                          parser.clear_cache)
+    yield "meal_parser.evaluate_500_lines_cached", None, measure(lambda: parser.evaluate(log), repeat)
+
+
+# -------------------------------
+# Full script reruns (AppTest), one interaction per tab
+APP_PROBE = """
+import json, os, statistics, sys, time
+from streamlit.testing.v1 import AppTest
+
+def rerun(at, action=None):
+    if action is not None:
+        action(at)
+    start = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1e3
+    assert not at.exception, at.exception
+    return elapsed
+
+at = AppTest.from_file("main.py", default_timeout=120)
+results = {"app.first_run": [rerun(at)]}
+steps = {
+    "app.rerun_idle": None,
+    "app.food_lookup": lambda at: (at.text_input[0].input("chiken"), at.button(key="food_lookup").click()),
+    "app.personal_plan": lambda at: at.button(key="personal_calc").click(),
+    "app.health_advice": lambda at: [c.check() for c in at.checkbox],
+}
+for _ in range(REPEAT):
+    for name, action in steps.items():
+        results.setdefault(name, []).append(rerun(at, action))
+        if name == "app.health_advice":
+            [c.uncheck() for c in at.checkbox]
+print(json.dumps({k: {"median_ms": statistics.median(v), "min_ms": min(v), "max_ms": max(v), "repeat": len(v),
+                      "number": 1} for k, v in results.items()}))
+"""
+
+
+def app_benchmarks(repeat: int):
+    # Fresh interpreter so the first run includes imports, like a new server process;
+    # the diary goes to a throwaway file
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, NUTRITION_DIARY=os.path.join(tmp, "diary.sqlite"))
+        out = subprocess.run([sys.executable, "-c", APP_PROBE.replace("REPEAT", str(repeat))], cwd=ROOT, env=env,
+                             capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"AppTest benchmark failed:\n{out.stderr}")
+    for name, result in json.loads(out.stdout.strip().splitlines()[-1]).items():
+        yield name, None, result
+
+
+# -------------------------------
+# Results and baseline comparison
+def _key(name: str, size) -> str:
+    return name if size is None else f"{name}[{size}]"
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list:
+    # (key, baseline ms, current ms) for every benchmark that got slower than allowed
+    regressions = []
+    for key, current in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        old, new = before["median_ms"], current["median_ms"]
+        if new > old * (1 + threshold) and new - old >= min_delta_ms:
+            regressions.append((key, old, new))
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine and app benchmark suite.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--app-repeat", type=int, default=5, help="AppTest reruns per tab (0 skips them)")
+    parser.add_argument("--out", default=os.path.join(ROOT, "benchmarks", "results.json"))
+    parser.add_argument("--baseline", default=os.path.join(ROOT, "benchmarks", "baseline.json"))
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05)
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    print(f"{'benchmark':<38} {'median ms':>10} {'min ms':>9} {'baseline':>9}")
+    groups = [engine_benchmarks(args.sizes, args.repeat)]
+    if args.app_repeat:
+        groups.append(app_benchmarks(args.app_repeat))
+    for group in groups:
+        for name, size, result in group:
+            key = _key(name, size)
+            results[key] = dict(result, name=name, size=size)
+            before = baseline.get(key, {}).get("median_ms")
+            print(f"{key:<38} {result['median_ms']:>10.4f} {result.get('min_ms', result['median_ms']):>9.4f} "
+                  f"{'' if before is None else f'{before:.4f}':>9}", flush=True)
+
+    report = {"meta": {"commit": _git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "python": platform.python_version(), "platform": platform.platform(),
+                       "sizes": args.sizes, "repeat": args.repeat},
+              "results": results}
+    for path in [args.out] + ([args.baseline] if args.save_baseline else []):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"wrote {path}")
+
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    for key, old, new in regressions:
+        print(f"REGRESSION {key}: {old:.4f} ms -> {new:.4f} ms (+{(new / old - 1) * 100:.0f}%)")
+    if baseline and not regressions:
+        print(f"no regressions over {args.threshold:.0%} against {args.baseline}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
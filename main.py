@@ -1,119 +1,54 @@
 # food_nutrition_health_assistant.py
+# Streamlit front end. All computation lives in nutrition_core; this file only
+# collects inputs and renders results.
+import re
+import secrets
 import streamlit as st
-import matplotlib.pyplot as plt
-from datetime import date
-from math import floor
+from datetime import date, timedelta
 
-# -------------------------------
-# Nutrition dictionary (per 100g)
-nutrition_dict = {
-    # Fruits
-    "apple": {"calories": 52, "protein": 0.3},
-    "banana": {"calories": 96, "protein": 1.3},
-    "orange": {"calories": 47, "protein": 0.9},
-    "grapes": {"calories": 69, "protein": 0.7},
-    "mango": {"calories": 60, "protein": 0.8},
-    "pineapple": {"calories": 50, "protein": 0.5},
-    "strawberry": {"calories": 33, "protein": 0.7},
-    "watermelon": {"calories": 30, "protein": 0.6},
-    "pear": {"calories": 57, "protein": 0.4},
-    "peach": {"calories": 39, "protein": 0.9},
-    "kiwi": {"calories": 61, "protein": 1.1},
-    "papaya": {"calories": 43, "protein": 0.5},
-    "pomegranate": {"calories": 83, "protein": 1.7},
-    "blueberry": {"calories": 57, "protein": 0.7},
-    "cherry": {"calories": 50, "protein": 1.0},
-    "avocado": {"calories": 160, "protein": 2.0},
-
-    # Vegetables
-    "carrot": {"calories": 41, "protein": 0.9},
-    "potato": {"calories": 77, "protein": 2.0},
-    "tomato": {"calories": 18, "protein": 0.9},
-    "cucumber": {"calories": 16, "protein": 0.7},
-    "broccoli": {"calories": 34, "protein": 2.8},
-    "spinach": {"calories": 23, "protein": 2.9},
-    "cabbage": {"calories": 25, "protein": 1.3},
-    "onion": {"calories": 40, "protein": 1.1},
-    "peas": {"calories": 81, "protein": 5.4},
-    "corn": {"calories": 86, "protein": 3.2},
-
-    # Staples
-    "rice": {"calories": 130, "protein": 2.7},
-    "bread": {"calories": 265, "protein": 9.0},
-    "pasta": {"calories": 131, "protein": 5.0},
-    "oats": {"calories": 389, "protein": 16.9},
-
-    # Proteins
-    "chicken": {"calories": 239, "protein": 27.0},
-    "beef": {"calories": 250, "protein": 26.0},
-    "mutton": {"calories": 294, "protein": 25.0},
-    "egg": {"calories": 155, "protein": 13.0},
-    "fish": {"calories": 206, "protein": 22.0},
-    "tofu": {"calories": 76, "protein": 8.0},
-    "lentils": {"calories": 116, "protein": 9.0},
-    "beans": {"calories": 347, "protein": 21.0},
-
-    # Fast Foods
-    "burger": {"calories": 295, "protein": 17.0},
-    "pizza": {"calories": 266, "protein": 11.0},
-    "sandwich": {"calories": 250, "protein": 12.0},
-    "fries": {"calories": 312, "protein": 3.4},
-    "hotdog": {"calories": 290, "protein": 11.0},
-
-    # Drinks / Others
-    "milk": {"calories": 42, "protein": 3.4},
-    "yogurt": {"calories": 59, "protein": 10.0},
-    "cheese": {"calories": 402, "protein": 25.0},
-    "ice cream": {"calories": 207, "protein": 3.5},
-    "chocolate": {"calories": 546, "protein": 7.8},
-    "coffee": {"calories": 2, "protein": 0.1},
-    "tea": {"calories": 1, "protein": 0.1}
-}
-
-# Small health tips for a few items
-health_tips = {
-    "apple": "Rich in fiber and Vitamin C — good for digestion.",
-    "banana": "High in potassium — great post-workout snack.",
-    "chicken": "High in protein — supports muscle repair & growth.",
-    "rice": "Good source of carbs — provides energy for workouts.",
-    "fish": "Contains omega-3 fatty acids — heart healthy.",
-    "mutton": "High in protein and iron — good for strength but calorie-dense.",
-    "beef": "Excellent protein & B12 source — helpful for muscle mass.",
-    "spinach": "High in iron and micronutrients — great in salads."
-}
-
-# Activity factors
-activity_factors = {
-    "Sedentary (little/no exercise)": 1.2,
-    "Light (1-3 days/week)": 1.375,
-    "Moderate (3-5 days/week)": 1.55,
-    "Active (6-7 days/week)": 1.725,
-    "Very Active (hard training/physical job)": 1.9
-}
+from nutrition_core import charts, filters, metrics, trajectory
+from nutrition_core.diary import default_diary
+from nutrition_core import (activity_factors, advice_for, calculate_age, combined_advice, condition_names,
+                            conditions, default_catalog, goals, timeline_note, workouts_for)
 
 # -------------------------------
-# Helpers
-def calculate_age(dob: date) -> int:
-    today = date.today()
-    return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-
-def calc_bmr(gender: str, weight: float, height: float, age: int) -> float:
-    # Mifflin-St Jeor
-    if gender.lower() == "male":
-        return 10 * weight + 6.25 * height - 5 * age + 5
-    else:
-        return 10 * weight + 6.25 * height - 5 * age - 161
+# Food catalog (per 100g) — loaded once per process and shared across reruns
+catalog = default_catalog()
+
+# Hidden debug panel: open the app with ?debug=1 (captures this rerun's spans only;
+# process-wide metrics stay as NUTRITION_METRICS set them)
+DEBUG = st.query_params.get("debug") == "1"
+# Streamlit stops a run early on a widget change (RerunException) or an error, before the
+# end_rerun at the bottom; end any capture such a run left on this reused script thread
+metrics.end_rerun()
+if DEBUG:
+    metrics.begin_rerun(profile=st.session_state.pop("profile_next", None))
+
+# Charts: "vega" draws natively in the browser; "png" uses matplotlib (cached bytes)
+CHART_RENDERER = "vega"
+
+
+def show_chart(spec_fn, image_fn, value):
+    with metrics.span("chart"):
+        if CHART_RENDERER == "vega":
+            st.vega_lite_chart(spec_fn(value), width="stretch")
+        else:
+            st.image(image_fn(value))
+
 
-def estimate_from_serving(food_key: str, gram: float):
-    info = nutrition_dict.get(food_key)
-    if not info:
-        return 0.0, 0.0
-    cal = (info["calories"] / 100.0) * gram
-    pro = (info["protein"] / 100.0) * gram
-    return cal, pro
+# Diary identity: the signed-in account when Streamlit auth (st.login) is configured, otherwise a
+# random key for this browser session. Diaries are never looked up by a typed name; the key is
+# shown to its owner, who can reopen the diary later with ?diary=<key>.
+DIARY_KEY = re.compile(r"[A-Za-z0-9_-]{22,64}")
 
-def small_health_tip(food_key: str):
-    return health_tips.get(food_key.lower(), None)
+
+def diary_owner() -> str:
+    if st.user.get("is_logged_in") and st.user.get("email"):
+        return "user:" + st.user.get("email")
+    if "diary_key" not in st.session_state:
+        key = st.query_params.get("diary", "")
+        st.session_state["diary_key"] = key if DIARY_KEY.fullmatch(key) else secrets.token_urlsafe(16)
+    return "key:" + st.session_state["diary_key"]
 
 # -------------------------------
 # Streamlit UI settings
@@ -127,7 +62,7 @@ tab_food, tab_personal, tab_health = st.tabs(["🍽️ Food Nutrition", "⚡ Per
 
 # -------------------------------
 # Tab 1: Food Nutrition
-with tab_food:
+with tab_food, metrics.span("tab.food"):
     st.write("### Food nutrition lookup (per 100g) — enter any food name and quantity in grams.")
     a_col, b_col = st.columns([2, 1])
     with a_col:
@@ -135,18 +70,23 @@ with tab_food:
     with b_col:
         quantity = st.number_input("Quantity (grams):", min_value=1, value=100)
 
+    # Autocomplete / did-you-mean hints while typing
+    if food_input.strip() and catalog.index.exact(food_input) is None:
+        suggestions = catalog.index.search(food_input, k=5)
+        if suggestions:
+            st.caption("Suggestions: " + ", ".join(m.name for m in suggestions))
+
     if st.button("Get Nutrition", key="food_lookup"):
         st.markdown("---")
-        food_name = food_input.strip().lower()
-        if not food_name:
+        if not food_input.strip():
             st.error("Please enter a food name.")
         else:
-            st.subheader(f"🍽️ {food_input.strip().capitalize()}")
-            if food_name in nutrition_dict:
-                cal_per100 = nutrition_dict[food_name]["calories"]
-                pro_per100 = nutrition_dict[food_name]["protein"]
-                total_cal = (cal_per100 / 100) * quantity
-                total_pro = (pro_per100 / 100) * quantity
+            result = catalog.lookup(food_input, quantity)
+            st.subheader(f"🍽️ {(result.name if result else food_input.strip()).capitalize()}")
+            if result is not None:
+                if result.name != result.query.lower():
+                    st.caption(f"Showing results for **{result.name}** (you typed \"{result.query}\").")
+                total_cal, total_pro = result.calories, result.protein
 
                 st.success(f"🔥 Calories: **{total_cal:.1f} kcal** — 💪 Protein: **{total_pro:.1f} g** (for {quantity} g)")
 
@@ -159,21 +99,88 @@ with tab_food:
 
                 st.info(f"📊 This is ~**{cal_pct:.1f}%** of your daily calories and **{pro_pct:.1f}%** of your daily protein target.")
 
-                # Chart
-                fig, ax = plt.subplots()
-                ax.bar(["Calories (kcal)", "Protein (g)"], [total_cal, total_pro], color=["#FF6347", "#4682B4"])
-                ax.set_title("Nutritional Breakdown")
-                st.pyplot(fig)
+                # Chart (rendered once per food and quantity)
+                show_chart(charts.food_chart_spec, charts.food_chart_image, result)
 
-                tip = small_health_tip(food_name)
-                if tip:
-                    st.markdown(f"💡 **Tip:** {tip}")
+                if result.tip:
+                    st.markdown(f"💡 **Tip:** {result.tip}")
             else:
                 st.error("❌ Nutrition info not available for this item. Try common names like 'chicken', 'rice', 'apple'.")
 
+    # Food diary (persistent, private to the signed-in user or this session's key)
+    st.markdown("---")
+    st.write("#### 📒 Food diary")
+    diary = default_diary()
+    diary_user = diary_owner()
+    if diary_user.startswith("key:"):
+        with st.expander("Your diary key"):
+            st.code(st.session_state["diary_key"], language=None)
+            st.caption("Your diary is private to this key. Open the app with `?diary=<key>` to come back to it; "
+                       "anyone with the key can read it.")
+    if st.button("Add to today's diary", key="diary_log"):
+        if not food_input.strip():
+            st.error("Please enter a food name.")
+        else:
+            try:
+                logged = diary.log(diary_user, food_input, quantity)
+                st.success(f"Logged {quantity} g of {logged}.")
+            except ValueError:
+                st.error("❌ Nutrition info not available for this item.")
+
+    # Whole meals or a pasted day's log as free text, priced in one batch
+    meal_text = st.text_area("Or describe a meal (one item or meal per line):", "",
+                             placeholder="2 eggs, 200g rice and a cup of milk\nLunch: grilled chicken (150 g) with a bowl of lentils",
+                             key="meal_text")
+    log_meal = st.checkbox("Also add these items to today's diary", key="meal_log")
+    if st.button("Estimate meal", key="meal_parse"):
+        if not meal_text.strip():
+            st.error("Please describe what you ate.")
+        else:
+            estimate = catalog.parse_meal(meal_text)
+            if estimate.items:
+                values = estimate.values
+                st.dataframe({"item": [p.text for p in estimate.items],
+                              "food": [p.food + (" (guess)" if p.guess else "") for p in estimate.items],
+                              "grams": [p.grams for p in estimate.items],
+                              "kcal": values["calories"].round(0), "protein g": values["protein"].round(1),
+                              "meal": [p.meal or "" for p in estimate.items]}, hide_index=True)
+                totals = estimate.totals
+                st.success(f"🔥 Total: **{totals['calories']:.0f} kcal** — 💪 **{totals['protein']:.1f} g protein** "
+                           f"({len(estimate.items)} items)")
+                guesses = [p for p in estimate.items if p.guess]
+                if guesses:
+                    st.caption("Foods marked (guess) are the closest spelling we have. They are not added to "
+                               "your diary; fix the spelling to log them.")
+                if log_meal:
+                    by_meal = {}
+                    for p in estimate.items:
+                        if not p.guess:
+                            by_meal.setdefault(p.meal, []).append((p.food, p.grams))
+                    try:
+                        for meal, items in by_meal.items():
+                            diary.log_many(diary_user, items, meal=meal)
+                        st.info(f"Added {len(estimate.items) - len(guesses)} items to your diary.")
+                    except ValueError:
+                        st.error("❌ Couldn't add these items to your diary.")
+            if estimate.unknown:
+                st.warning("Couldn't match: " + ", ".join(f"\"{p.text}\"" for p in estimate.unknown))
+
+    today_totals = diary.day_totals(diary_user)
+    if today_totals.entries:
+        daily_cals = st.session_state.get("target_cals", 2000)
+        daily_protein = st.session_state.get("target_protein", 50)
+        st.info(f"Today: **{today_totals.calories:.0f} kcal** ({today_totals.calories / daily_cals * 100:.0f}% of target)"
+                f" — **{today_totals.protein:.0f} g protein** ({today_totals.protein / daily_protein * 100:.0f}%)."
+                f" 7-day average: {today_totals.week_calories / 7:.0f} kcal/day.")
+        for entry in diary.entries(diary_user):
+            st.write(f"- {entry.food.capitalize()} — {entry.grams:g} g → {entry.calories:.0f} kcal, {entry.protein:.1f} g protein")
+    history = diary.history(diary_user, date.fromordinal(date.today().toordinal() - 29))
+    if len(history) > 1:
+        st.vega_lite_chart(charts.diary_chart_spec(history), width="stretch")
+
 # -------------------------------
 # Tab 2: Personal Plan & Daily Needs
-with tab_personal:
+with tab_personal, metrics.span("tab.personal"):
     st.write("### Personal daily needs & a sample diet/workout plan")
     # Input row 1: DOB & gender
     c1, c2 = st.columns(2)
@@ -191,11 +198,22 @@ with tab_personal:
 
     age = calculate_age(dob)
 
-    goal = st.selectbox("Goal:", ["Maintain Weight", "Lose Weight (fat loss)", "Gain Muscle (lean mass)"])
+    goal = st.selectbox("Goal:", goals)
     activity_label = st.selectbox("Activity Level:", list(activity_factors.keys()), index=2)
-    activity_factor = activity_factors[activity_label]
 
-    target_date = st.date_input("Target date to achieve goal (optional):", value=date.today())
+    t1, t2 = st.columns(2)
+    with t1:
+        target_date = st.date_input("Target date to achieve goal (optional):", value=date.today())
+    with t2:
+        goal_weight = st.number_input("Goal weight (kg, optional):", min_value=30.0, max_value=300.0, value=None,
+                                      step=0.5)
+
+    p1, p2 = st.columns(2)
+    with p1:
+        avoid_input = st.text_input("Foods to avoid in the plan (comma-separated, optional):", "")
+    with p2:
+        plan_conditions = st.multiselect("Health conditions to respect in the plan:", list(condition_names),
+                                         format_func=condition_names.get)
 
     if st.button("Calculate Personal Plan", key="personal_calc"):
         st.markdown("---")
@@ -203,122 +221,113 @@ with tab_personal:
         st.write(f"Age: **{age}** — Gender: **{gender}** — Weight: **{weight:.1f} kg** — Height: **{height:.1f} cm**")
         st.write(f"Activity: **{activity_label}** — Goal: **{goal}**")
 
-        bmr = calc_bmr(gender, weight, height, age)
-        maintenance = bmr * activity_factor
-
-        if goal == "Lose Weight (fat loss)":
-            target_cals = maintenance - 500
-        elif goal == "Gain Muscle (lean mass)":
-            target_cals = maintenance + 300
-        else:
-            target_cals = maintenance
-
-        # Protein targets by goal
-        if goal == "Gain Muscle (lean mass)":
-            protein_target = weight * 1.8
-        elif goal == "Lose Weight (fat loss)":
-            protein_target = weight * 1.5
-        else:
-            protein_target = weight * 1.2
+        # Targets, plan and feedback are cached per process on the normalized inputs
+        result = catalog.personal_plan(gender, weight, height, age, goal, activity_label,
+                                       exclude=avoid_input.split(","), conditions=plan_conditions)
+        targets = result.targets
+        target_cals, protein_target = targets.target_cals, targets.protein_target
 
         # Save session targets
         st.session_state["target_cals"] = target_cals
         st.session_state["target_protein"] = protein_target
 
-        st.success(f"⚡ BMR: **{bmr:.0f} kcal/day** — Maintenance: **{maintenance:.0f} kcal/day**")
+        st.success(f"⚡ BMR: **{targets.bmr:.0f} kcal/day** — Maintenance: **{targets.maintenance:.0f} kcal/day**")
         st.success(f"🔥 Target Calories: **{target_cals:.0f} kcal/day** — 💪 Protein target: **{protein_target:.0f} g/day**")
 
-        # Diet plan (rule-based sample)
+        # Diet plan (optimized from the nutrition table)
         st.markdown("### 🍱 Sample Daily Diet Plan (example, adjustable)")
-        def build_plan_for_goal(goal_choice):
-            plan = {"Breakfast": [], "Lunch": [], "Snack": [], "Dinner": []}
-            if goal_choice == "Gain Muscle (lean mass)":
-                plan["Breakfast"] = [("oats", 70), ("milk", 200), ("banana", 120)]
-                plan["Lunch"] = [("rice", 200), ("chicken", 180), ("spinach", 100)]
-                plan["Snack"] = [("yogurt", 150), ("egg", 50)]
-                plan["Dinner"] = [("beef", 180), ("potato", 150), ("broccoli", 100)]
-            elif goal_choice == "Lose Weight (fat loss)":
-                plan["Breakfast"] = [("oats", 40), ("milk", 150), ("apple", 120)]
-                plan["Lunch"] = [("chicken", 150), ("spinach", 150), ("tomato", 100)]
-                plan["Snack"] = [("yogurt", 120), ("banana", 80)]
-                plan["Dinner"] = [("fish", 150), ("broccoli", 120), ("cucumber", 100)]
-            else:
-                plan["Breakfast"] = [("oats", 50), ("milk", 200), ("banana", 100)]
-                plan["Lunch"] = [("rice", 180), ("chicken", 150), ("peas", 100)]
-                plan["Snack"] = [("apple", 150), ("yogurt", 120)]
-                plan["Dinner"] = [("fish", 150), ("potato", 150), ("spinach", 100)]
-            return plan
-
-        plan = build_plan_for_goal(goal)
-        plan_totals = {"cal": 0.0, "pro": 0.0}
-        for meal, items in plan.items():
+        summary = result.summary
+        for meal, items in summary.items.items():
             with st.expander(meal + " (click to expand)", expanded=(meal == "Breakfast")):
-                meal_cal = 0.0
-                meal_pro = 0.0
-                for fk, g in items:
-                    cal, pro = estimate_from_serving(fk, g)
-                    meal_cal += cal
-                    meal_pro += pro
+                for fk, g, cal, pro in items:
                     st.write(f"- {fk.capitalize()} — {g} g → {cal:.0f} kcal, {pro:.1f} g protein")
+                meal_cal, meal_pro = summary.meals[meal]
                 st.markdown(f"**Meal total:** {meal_cal:.0f} kcal — {meal_pro:.1f} g protein")
-                plan_totals["cal"] += meal_cal
-                plan_totals["pro"] += meal_pro
+        show_chart(charts.plan_chart_spec, charts.plan_chart_image, summary)
 
         st.markdown("---")
         st.subheader("Plan summary vs targets")
-        st.write(f"Planned calories: **{plan_totals['cal']:.0f} kcal** — Target: **{target_cals:.0f} kcal**")
-        st.write(f"Planned protein: **{plan_totals['pro']:.0f} g** — Target: **{protein_target:.0f} g**")
-        if plan_totals["cal"] < target_cals:
-            st.info(f"Planned meals are **{target_cals - plan_totals['cal']:.0f} kcal** below target — consider an extra snack or slightly larger portions.")
-        elif plan_totals["cal"] > target_cals + 200:
-            st.info(f"Planned meals are **{plan_totals['cal'] - target_cals:.0f} kcal** above target — consider slightly smaller portions or leaner choices.")
-        else:
-            st.success("Planned meals are close to your calorie target — good balance!")
-
-        if plan_totals["pro"] < protein_target:
-            st.info(f"Protein is **{protein_target - plan_totals['pro']:.0f} g** below target — add an egg, extra yogurt, or more chicken/fish.")
-        else:
-            st.success("Protein target is covered by the plan ✔️")
+        st.write(f"Planned calories: **{summary.calories:.0f} kcal** — Target: **{target_cals:.0f} kcal**")
+        st.write(f"Planned protein: **{summary.protein:.0f} g** — Target: **{protein_target:.0f} g**")
+        for level, message in result.feedback:
+            getattr(st, level)(message)
 
         # Workout suggestions
         st.markdown("### 🏋️ Workout Suggestions")
-        if goal == "Lose Weight (fat loss)":
-            st.write("- Cardio: 30–45 min moderate cardio most days (5×/week).")
-            st.write("- Strength: 2–3 full-body sessions/week (20–30 min) to preserve muscle.")
-            st.write("- Daily movement and sleep help manage appetite and energy.")
-        elif goal == "Gain Muscle (lean mass)":
-            st.write("- Strength: 45–60 min, 4 days/week (progressive overload).")
-            st.write("- Cardio: light 10–20 min 2×/week to keep conditioning.")
-            st.write("- Prioritize protein intake, gradual calorie surplus, and rest.")
-        else:
-            st.write("- 30 min moderate activity most days + 2 strength sessions/week for maintenance.")
-
-        # Timeline (if using target_date)
-        if target_date and target_date > date.today():
-            days_left = (target_date - date.today()).days
+        for line in workouts_for(goal):
+            st.write(f"- {line}")
+
+        # Timeline: day-by-day weight projection to the target date (a year if none), every activity
+        # level at this goal's calorie adjustments; goal dates are searched up to ten years out
+        today = date.today()
+        days_left = (target_date - today).days if target_date and target_date > today else 0
+        if days_left or goal_weight is not None:
             st.markdown("---")
-            st.subheader("Timeline note")
-            if goal == "Lose Weight (fat loss)":
-                st.write(f"{days_left} days left. Safe loss: ~0.25–0.5 kg/week; be patient and consistent.")
-            elif goal == "Gain Muscle (lean mass)":
-                st.write(f"{days_left} days left. Muscle gains are slow — aim for ~0.25–0.5 kg/month of lean mass.")
+            st.subheader("Timeline & weight projection")
+            if days_left:
+                st.write(timeline_note(goal, days_left))
+            labels = list(activity_factors)
+            adjustments = trajectory.goal_adjustment_options[goal]
+            with metrics.span("projection"):
+                projection = trajectory.project_weight(gender, weight, height, age,
+                                                       *trajectory.scenario_grid(labels, adjustments),
+                                                       days=trajectory.MAX_DAYS, goal_weight=goal_weight)
+            adjustment = round(target_cals - targets.maintenance)
+            chosen = projection.scenarios.index(trajectory.Scenario(activity_label, adjustment))
+            horizon = days_left or 365
+            floor_day = projection.floor_day[chosen]
+            if floor_day == 0:
+                st.warning(f"Your weight is below **{trajectory.floor_weight(height):.1f} kg** "
+                           f"(BMI {trajectory.MIN_BMI:g}) for your height, so no projection is shown. "
+                           "Please talk to a doctor before trying to lose weight.")
+            elif 0 < floor_day <= horizon:
+                st.warning(f"Eating **{projection.intake[chosen]:.0f} kcal/day**, your weight would fall below "
+                           f"**{trajectory.floor_weight(height):.1f} kg** (BMI {trajectory.MIN_BMI:g}) by "
+                           f"{today + timedelta(days=int(floor_day)):%d %b %Y}, so the projection stops there. "
+                           "Choose a smaller deficit or a higher goal weight.")
             else:
-                st.write(f"{days_left} days left — focus on consistency.")
-
-        st.balloons()
+                st.write(f"Eating **{projection.intake[chosen]:.0f} kcal/day**, your weight on "
+                         f"{today + timedelta(days=horizon):%d %b %Y} is projected at "
+                         f"**{projection.weights[chosen, horizon]:.1f} kg** (BMR recalculated as your weight changes).")
+            if goal_weight is not None:
+                reached = trajectory.goal_dates(projection, today)
+                if goal_weight < trajectory.floor_weight(height):
+                    st.warning(f"{goal_weight:.1f} kg is below BMI {trajectory.MIN_BMI:g} for your height; "
+                               "projections stop before reaching it.")
+                elif reached[chosen] is None:
+                    st.info(f"{goal_weight:.1f} kg is not reached within ten years on this plan.")
+                else:
+                    note = ""
+                    if days_left:
+                        note = " — before your target date" if reached[chosen] <= target_date else " — after your target date"
+                    st.success(f"🎯 Estimated goal date: **{reached[chosen]:%d %b %Y}** "
+                               f"({projection.goal_day[chosen]} days){note}.")
+            # Chart: every activity level at this plan's adjustment, yours highlighted
+            same = [i for i, s in enumerate(projection.scenarios) if s.adjustment == adjustment]
+            st.vega_lite_chart(charts.projection_chart_spec(trajectory.subset(projection, same), today, horizon,
+                                                            goal_weight, highlight=same.index(chosen)),
+                               width="stretch")
+            if goal_weight is not None and len(adjustments) > 1:
+                st.caption("Estimated goal date by activity level and daily calorie adjustment:")
+                table = {"activity": [label.split(" (")[0] for label in labels]}
+                for k, option in enumerate(adjustments):
+                    table[f"{option:+d} kcal"] = [f"{d:%d %b %Y}" if d else "—" for d in reached[k::len(adjustments)]]
+                st.dataframe(table, hide_index=True)
+
+        with metrics.span("balloons"):
+            st.balloons()
 
 # -------------------------------
 # Tab 3: Health Advisor (Diabetes & Blood Pressure)
-with tab_health:
+with tab_health, metrics.span("tab.health"):
     st.write("### Health Advisor — basic condition-aware diet & activity suggestions")
     st.markdown("Select any conditions you have. This section gives conservative, general recommendations to help manage common conditions. **Not medical advice.**")
-    cond_cols = st.columns(3)
-    with cond_cols[0]:
-        has_diabetes = st.checkbox("Diabetes (type 1 / type 2)")
-    with cond_cols[1]:
-        has_high_bp = st.checkbox("High Blood Pressure (Hypertension)")
-    with cond_cols[2]:
-        has_low_bp = st.checkbox("Low Blood Pressure (Hypotension)")
+    cond_cols = st.columns(len(conditions))
+    selected = []
+    for col, (key, label) in zip(cond_cols, conditions.items()):
+        with col:
+            if st.checkbox(label):
+                selected.append(key)
 
     # Basic medical info to tailor suggestions (reuse personal inputs if already filled)
     st.write("Provide some basic details (these help tailor simple suggestions):")
@@ -331,66 +340,65 @@ with tab_health:
         bp_weight = st.number_input("Weight (kg) (optional):", min_value=30.0, max_value=300.0, value=70.0, key="weight_health")
 
     # If none selected, show info
-    if not (has_diabetes or has_high_bp or has_low_bp):
+    if not selected:
         st.info("Select one or more conditions to receive condition-aware diet & activity tips.")
     else:
         st.markdown("---")
-        # DIABETES ADVICE
-        if has_diabetes:
-            st.subheader("Diabetes — diet & activity suggestions")
-            st.write("Goal: control blood glucose by managing carbs, prioritizing fiber, and regular activity.")
-            st.markdown("**Diet tips (general):**")
-            st.write("- Favor complex carbs (oats, legumes), vegetables, lean proteins, and healthy fats.")
-            st.write("- Avoid sugary drinks, sweets, white bread, and highly processed foods.")
-            st.write("- Prefer whole fruits over fruit juices. Monitor portion sizes of starchy foods (rice, potatoes).")
-            st.write("- Spread carbohydrates across the day and include protein & fiber to slow glucose spikes.")
-            st.markdown("**Sample daily choices:**")
-            st.write("- Breakfast: oats + milk + berries or egg + veggies.")
-            st.write("- Lunch: lentils/beans or chicken + lots of salad/vegetables + small portion of rice.")
-            st.write("- Snack: apple + nuts or yogurt.")
-            st.write("- Dinner: fish/tofu + veggies (smaller carb portion).")
-            st.markdown("**Activity:**")
-            st.write("- Aim for ~30 minutes moderate exercise (walking) most days; strength training 2×/week helps insulin sensitivity.")
-            st.markdown("**Monitoring & Caution:**")
-            st.write("- If on medication (insulin or others), follow medical advice and monitor blood glucose; adjust carbs with clinician guidance.")
-            st.write("- This tool gives general tips — always consult your doctor for treatment.")
-
-        # HIGH BLOOD PRESSURE ADVICE
-        if has_high_bp:
-            st.subheader("High Blood Pressure — diet & activity suggestions")
-            st.write("Goal: lower blood pressure naturally via reduced salt, increased potassium, weight management, and cardio.")
-            st.markdown("**Diet tips (general):**")
-            st.write("- Reduce added salt and processed foods high in sodium.")
-            st.write("- Eat potassium-rich foods (banana, spinach, potatoes in moderation), fresh fruits & vegetables, lean proteins.")
-            st.write("- Favor low-fat dairy (milk, yogurt) and whole grains.")
-            st.markdown("**Foods to avoid / limit:**")
-            st.write("- Salty snacks, canned soups high in sodium, processed meats (sausages, bacon), excessive alcohol.")
-            st.markdown("**Activity:**")
-            st.write("- Regular aerobic activity (30 minutes most days) — brisk walking, cycling, or swimming helps reduce BP.")
-            st.write("- Strength training 2×/week is fine; check with a clinician if you have severe hypertension.")
-            st.markdown("**Monitoring & Caution:**")
-            st.write("- If on BP medication, follow your clinician; sudden large changes in diet/exercise should be discussed with them.")
-
-        # LOW BLOOD PRESSURE ADVICE
-        if has_low_bp:
-            st.subheader("Low Blood Pressure — diet & activity suggestions")
-            st.write("Goal: maintain adequate blood pressure and avoid dizziness/fainting.")
-            st.markdown("**Diet tips (general):**")
-            st.write("- Stay well-hydrated, include small frequent meals, increase salt moderately if advised by clinician.")
-            st.write("- Include balanced carbs and proteins; avoid sudden large meals that cause 'postprandial' drops.")
-            st.markdown("**Activity:**")
-            st.write("- Gentle aerobic activity (walking) is good; avoid sudden standing up from sitting quickly.")
-            st.write("- Strength training is helpful; focus on good hydration and gradual progress.")
-            st.markdown("**Monitoring & Caution:**")
-            st.write("- If you feel faint/dizzy frequently, consult a clinician. Do not self-medicate.")
+        with metrics.span("advice"):
+            for advice in advice_for(selected):
+                st.subheader(advice["title"])
+                st.write(advice["goal"])
+                for heading, lines in advice["sections"]:
+                    st.markdown(f"**{heading}:**")
+                    for line in lines:
+                        st.write(f"- {line}")
 
         st.markdown("---")
         st.subheader("Practical combined advice (if multiple conditions)")
-        st.write("- Emphasize whole foods, lean proteins, vegetables, and controlled portions.")
-        st.write("- Avoid sugary drinks & excessive salt; prioritize hydration and regular activity.")
-        st.write("- Use the Personal Plan tab to get calorie & protein targets, then apply these condition-specific food choices.")
+        for line in combined_advice:
+            st.write(f"- {line}")
         st.success("These are general lifestyle recommendations. For tailored medical advice, tests, and prescriptions, consult a healthcare professional.")
 
+        # Foods that pass every selected condition's nutrient rules (bitset intersection)
+        st.markdown("---")
+        st.subheader("🥦 Foods that suit all selected conditions")
+        max_kcal = st.number_input("Max calories per 100 g:", min_value=10, max_value=900, value=300, step=10,
+                                   key="suitable_kcal")
+        with metrics.span("suitable_foods"):
+            ids = catalog.filter.query(selected, max_calories=max_kcal)
+        if not len(ids):
+            st.info("No foods in the catalog match all selected conditions under that calorie limit.")
+        else:
+            store = catalog.store
+            columns = store.columns
+            st.dataframe({"food": [store.names[i] for i in ids.tolist()],
+                          "category": [store.text_of("category", i) for i in ids.tolist()],
+                          "kcal": columns["calories"][ids], "carbs g": columns["carbs"][ids],
+                          "sugar g": columns["sugar"][ids], "GI": columns["gi"][ids],
+                          "sodium mg": columns["sodium"][ids], "potassium mg": columns["potassium"][ids]},
+                         hide_index=True)
+            rules = [f"{condition_names[c]}: {filters.describe_rules(c)}" for c in selected if filters.describe_rules(c)]
+            st.caption("Per 100 g. " + "; ".join(rules) + "." if rules else "Per 100 g.")
+
 # End of app
 st.markdown("---")
 
+if DEBUG:
+    report = metrics.end_rerun()
+    with st.expander("🛠️ Debug: timings, counters, profile"):
+        st.write(f"This rerun: **{report.total_ms:.1f} ms**")
+        for name, ms in report.spans:
+            st.write(f"- `{name}` — {ms:.2f} ms")
+        st.write("Counters (this rerun):", report.counters)
+        st.write("Plan result cache:", catalog.results.stats()._asdict())
+        st.write("Chart caches:", {name: info._asdict() for name, info in charts.cache_info().items()})
+
+        profiler = st.selectbox("Profiler:", metrics.profilers(), key="debug_profiler")
+        if st.button("Profile one rerun", key="debug_profile"):
+            st.session_state["profile_next"] = profiler
+            st.rerun()
+        if report.profile:
+            st.session_state["profile_report"] = report.profile
+        if "profile_report" in st.session_state:
+            st.code(st.session_state["profile_report"], language="text")
+        st.code(metrics.prometheus_text(), language="text")
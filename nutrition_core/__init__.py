@@ -0,0 +1,43 @@
+# nutrition_core
+# Headless engine behind the Streamlit app: daily targets, food lookup, meal
+# plans and advisor text. Importing the package stays cheap (pure Python);
+# numpy and the food database load only when lookup or plan names are used.
+import importlib
+
+from .advice import (advice_for, combined_advice, condition_advice, condition_names, conditions,
+                     plan_feedback, timeline_note, workouts_for)
+from .targets import (GAIN, LOSE, MAINTAIN, Targets, activity_factors, calc_bmr, calculate_age,
+                      daily_targets, goals)
+
+# Heavy names, imported from their module on first attribute access
+_lazy = {
+    "Catalog": ".lookup",
+    "FoodLookup": ".lookup",
+    "PersonalPlan": ".lookup",
+    "default_catalog": ".lookup",
+    "estimate_from_serving": ".lookup",
+    "small_health_tip": ".lookup",
+    "MealPlanner": ".plans",
+    "summarize_plan": ".plans",
+    "FoodSearchIndex": ".search",
+    "FoodFilter": ".filters",
+    "MealParser": ".meal_parser",
+    "Projection": ".trajectory",
+    "project_weight": ".trajectory",
+    "ResultCache": ".cache",
+    "NutritionStore": ".store",
+    "load_food_db": ".food_db",
+}
+
+
+def __getattr__(name):
+    module = _lazy.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy))
@@ -0,0 +1,139 @@
+# advice.py
+# Advisor text for the Personal Plan and Health Advisor tabs, kept as data so
+# any front end (Streamlit, HTTP, batch) renders the same content.
+from .targets import GAIN, LOSE
+
+# Condition keys -> checkbox labels in the Health Advisor tab
+conditions = {
+    "diabetes": "Diabetes (type 1 / type 2)",
+    "high_bp": "High Blood Pressure (Hypertension)",
+    "low_bp": "Low Blood Pressure (Hypotension)",
+}
+
+# Condition keys -> short labels (plan filters, API)
+condition_names = {
+    "diabetes": "Diabetes",
+    "high_bp": "High Blood Pressure",
+    "low_bp": "Low Blood Pressure",
+}
+
+condition_advice = {
+    "diabetes": {
+        "title": "Diabetes — diet & activity suggestions",
+        "goal": "Goal: control blood glucose by managing carbs, prioritizing fiber, and regular activity.",
+        "sections": [
+            ("Diet tips (general)", [
+                "Favor complex carbs (oats, legumes), vegetables, lean proteins, and healthy fats.",
+                "Avoid sugary drinks, sweets, white bread, and highly processed foods.",
+                "Prefer whole fruits over fruit juices. Monitor portion sizes of starchy foods (rice, potatoes).",
+                "Spread carbohydrates across the day and include protein & fiber to slow glucose spikes.",
+            ]),
+            ("Sample daily choices", [
+                "Breakfast: oats + milk + berries or egg + veggies.",
+                "Lunch: lentils/beans or chicken + lots of salad/vegetables + small portion of rice.",
+                "Snack: apple + nuts or yogurt.",
+                "Dinner: fish/tofu + veggies (smaller carb portion).",
+            ]),
+            ("Activity", [
+                "Aim for ~30 minutes moderate exercise (walking) most days; strength training 2×/week helps insulin sensitivity.",
+            ]),
+            ("Monitoring & Caution", [
+                "If on medication (insulin or others), follow medical advice and monitor blood glucose; adjust carbs with clinician guidance.",
+                "This tool gives general tips — always consult your doctor for treatment.",
+            ]),
+        ],
+    },
+    "high_bp": {
+        "title": "High Blood Pressure — diet & activity suggestions",
+        "goal": "Goal: lower blood pressure naturally via reduced salt, increased potassium, weight management, and cardio.",
+        "sections": [
+            ("Diet tips (general)", [
+                "Reduce added salt and processed foods high in sodium.",
+                "Eat potassium-rich foods (banana, spinach, potatoes in moderation), fresh fruits & vegetables, lean proteins.",
+                "Favor low-fat dairy (milk, yogurt) and whole grains.",
+            ]),
+            ("Foods to avoid / limit", [
+                "Salty snacks, canned soups high in sodium, processed meats (sausages, bacon), excessive alcohol.",
+            ]),
+            ("Activity", [
+                "Regular aerobic activity (30 minutes most days) — brisk walking, cycling, or swimming helps reduce BP.",
+                "Strength training 2×/week is fine; check with a clinician if you have severe hypertension.",
+            ]),
+            ("Monitoring & Caution", [
+                "If on BP medication, follow your clinician; sudden large changes in diet/exercise should be discussed with them.",
+            ]),
+        ],
+    },
+    "low_bp": {
+        "title": "Low Blood Pressure — diet & activity suggestions",
+        "goal": "Goal: maintain adequate blood pressure and avoid dizziness/fainting.",
+        "sections": [
+            ("Diet tips (general)", [
+                "Stay well-hydrated, include small frequent meals, increase salt moderately if advised by clinician.",
+                "Include balanced carbs and proteins; avoid sudden large meals that cause 'postprandial' drops.",
+            ]),
+            ("Activity", [
+                "Gentle aerobic activity (walking) is good; avoid sudden standing up from sitting quickly.",
+                "Strength training is helpful; focus on good hydration and gradual progress.",
+            ]),
+            ("Monitoring & Caution", [
+                "If you feel faint/dizzy frequently, consult a clinician. Do not self-medicate.",
+            ]),
+        ],
+    },
+}
+
+combined_advice = [
+    "Emphasize whole foods, lean proteins, vegetables, and controlled portions.",
+    "Avoid sugary drinks & excessive salt; prioritize hydration and regular activity.",
+    "Use the Personal Plan tab to get calorie & protein targets, then apply these condition-specific food choices.",
+]
+
+workout_suggestions = {
+    LOSE: [
+        "Cardio: 30–45 min moderate cardio most days (5×/week).",
+        "Strength: 2–3 full-body sessions/week (20–30 min) to preserve muscle.",
+        "Daily movement and sleep help manage appetite and energy.",
+    ],
+    GAIN: [
+        "Strength: 45–60 min, 4 days/week (progressive overload).",
+        "Cardio: light 10–20 min 2×/week to keep conditioning.",
+        "Prioritize protein intake, gradual calorie surplus, and rest.",
+    ],
+}
+default_workout = ["30 min moderate activity most days + 2 strength sessions/week for maintenance."]
+
+
+def advice_for(selected) -> list:
+    # Advice blocks for the selected condition keys, in display order
+    return [condition_advice[key] for key in condition_advice if key in selected]
+
+
+def workouts_for(goal: str) -> list:
+    return workout_suggestions.get(goal, default_workout)
+
+
+def timeline_note(goal: str, days_left: int) -> str:
+    if goal == LOSE:
+        return f"{days_left} days left. Safe loss: ~0.25–0.5 kg/week; be patient and consistent."
+    elif goal == GAIN:
+        return f"{days_left} days left. Muscle gains are slow — aim for ~0.25–0.5 kg/month of lean mass."
+    else:
+        return f"{days_left} days left — focus on consistency."
+
+
+def plan_feedback(planned_cals: float, planned_protein: float, target_cals: float, protein_target: float) -> list:
+    # (level, message) pairs comparing a plan with the targets; level is "info" or "success"
+    messages = []
+    if planned_cals < target_cals - 50:
+        messages.append(("info", f"Planned meals are **{target_cals - planned_cals:.0f} kcal** below target — consider an extra snack or slightly larger portions."))
+    elif planned_cals > target_cals + 200:
+        messages.append(("info", f"Planned meals are **{planned_cals - target_cals:.0f} kcal** above target — consider slightly smaller portions or leaner choices."))
+    else:
+        messages.append(("success", "Planned meals are close to your calorie target — good balance!"))
+
+    if planned_protein < protein_target:
+        messages.append(("info", f"Protein is **{protein_target - planned_protein:.0f} g** below target — add an egg, extra yogurt, or more chicken/fish."))
+    else:
+        messages.append(("success", "Protein target is covered by the plan ✔️"))
+    return messages
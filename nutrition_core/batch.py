@@ -0,0 +1,333 @@
+# batch.py
+# Daily targets (and optionally a meal plan) for whole cohorts. Rows are
+# streamed from CSV or Parquet in chunks, computed column-wise with numpy
+# using the same formulas as targets.calc_bmr / daily_targets, and streamed
+# back out. Chunks can be spread over a process pool.
+#
+#   python -m nutrition_core.batch patients.csv targets.parquet --plans --workers 4
+#
+# Input columns: dob, gender, weight (kg), height (cm), goal, activity. Other
+# columns (ids etc.) are passed through. Rows that can't be computed get an
+# "error" message and empty outputs instead of stopping the run.
+import argparse
+import csv
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+
+from .targets import activity_aliases, activity_factors, goal_aliases, goal_calorie_adjustment, goal_protein_per_kg
+
+INPUT_COLUMNS = ["dob", "gender", "weight", "height", "goal", "activity"]
+TARGET_COLUMNS = ["age", "bmr", "maintenance", "target_cals", "protein_target"]
+PLAN_COLUMNS = ["plan", "plan_calories", "plan_protein"]
+# Output columns written as integers; every other numeric column is float64. Fixed by
+# name, not by the data, so every chunk of one output gets the same schema.
+INTEGER_COLUMNS = {"age"}
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+_gender_male = {"male": True, "m": True, "female": False, "f": False}
+
+
+# -------------------------------
+# Vectorized targets
+def _floats(values) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.full(len(values), np.nan)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                pass
+        return out
+
+
+def _dates(values) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype="datetime64[D]")
+    except (TypeError, ValueError):
+        out = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[D]")
+        for i, v in enumerate(values):
+            try:
+                out[i] = np.datetime64(v, "D")
+            except (TypeError, ValueError):
+                pass
+        return out
+
+
+def _lookup(values, table: dict, fallback=np.nan) -> np.ndarray:
+    # Map labels through a small dict, once per distinct label; unknown -> fallback
+    labels, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    mapped = [table.get(label.strip().lower(), fallback) for label in labels]
+    dtype = np.float64 if isinstance(fallback, float) else object
+    return np.asarray(mapped, dtype=dtype)[inverse.ravel()]
+
+
+def compute_targets(columns: dict, today: date = None) -> dict:
+    # columns: {name: sequence} with the INPUT_COLUMNS; returns the TARGET_COLUMNS plus "error"
+    today = today or date.today()
+    n = len(columns["dob"])
+
+    dob = _dates(columns["dob"])
+    years = dob.astype("datetime64[Y]").astype(np.int64) + 1970
+    months = dob.astype("datetime64[M]")
+    month = months.astype(np.int64) % 12 + 1
+    day = (dob - months.astype("datetime64[D]")).astype(np.int64) + 1
+    birthday_pending = (month > today.month) | ((month == today.month) & (day > today.day))
+    age = (today.year - years - birthday_pending).astype(np.float64)
+    age[np.isnat(dob)] = np.nan
+
+    weight = _floats(columns["weight"])
+    height = _floats(columns["height"])
+    male = _lookup(columns["gender"], {k: float(v) for k, v in _gender_male.items()})
+    factor = _lookup(columns["activity"], {k: activity_factors[v] for k, v in activity_aliases.items()})
+    adjustment = _lookup(columns["goal"], {k: float(goal_calorie_adjustment[v]) for k, v in goal_aliases.items()})
+    per_kg = _lookup(columns["goal"], {k: goal_protein_per_kg[v] for k, v in goal_aliases.items()})
+
+    # Mifflin-St Jeor, as in targets.calc_bmr
+    bmr = 10 * weight + 6.25 * height - 5 * age + np.where(male == 1.0, 5.0, -161.0)
+    bmr[np.isnan(male)] = np.nan
+    maintenance = bmr * factor
+    target_cals = maintenance + adjustment
+    protein_target = weight * per_kg
+
+    error = np.full(n, "", dtype=object)
+    for mask, message in ((np.isnan(age) | (age < 0), "invalid dob"),
+                          (np.isnan(male), "unknown gender"),
+                          (np.isnan(weight) | (weight <= 0), "invalid weight"),
+                          (np.isnan(height) | (height <= 0), "invalid height"),
+                          (np.isnan(per_kg), "unknown goal"),
+                          (np.isnan(factor), "unknown activity")):
+        if mask.any():
+            error[mask] = [e + "; " + message if e else message for e in error[mask]]
+
+    out = {"age": age, "bmr": np.round(bmr, 1), "maintenance": np.round(maintenance, 1),
+           "target_cals": np.round(target_cals, 1), "protein_target": np.round(protein_target, 1)}
+    # A row with an error gets no outputs at all, not figures computed from the bad field
+    failed = error != ""
+    for values in out.values():
+        values[failed] = np.nan
+    out["error"] = error
+    return out
+
+
+# -------------------------------
+# Plans (per worker process, memoized on rounded targets)
+PLAN_KCAL_STEP = 25     # rows whose targets round to the same step share a plan
+PLAN_PROTEIN_STEP = 5
+
+
+@lru_cache(maxsize=4096)
+def _plan_for(target_cals: int, protein_target: int):
+    from .lookup import default_catalog
+    catalog = default_catalog()
+    plan = catalog.plan(target_cals, protein_target)
+    summary = catalog.summarize(plan)
+    text = "; ".join(f"{meal}: " + ", ".join(f"{fk} {g}g" for fk, g in items)
+                     for meal, items in plan.items() if items)
+    return text, round(summary.calories, 1), round(summary.protein, 1)
+
+
+def compute_plans(target_cals: np.ndarray, protein_target: np.ndarray) -> dict:
+    # Rows without targets (NaN, as compute_targets leaves failed rows) get no plan
+    plans = np.full(len(target_cals), "", dtype=object)
+    cals = np.full(len(target_cals), np.nan)
+    pros = np.full(len(target_cals), np.nan)
+    valid = ~(np.isnan(target_cals) | np.isnan(protein_target)) & (target_cals > 0) & (protein_target > 0)
+    # Rows sharing rounded targets share one plan
+    keys = np.stack([np.round(target_cals[valid] / PLAN_KCAL_STEP) * PLAN_KCAL_STEP,
+                     np.round(protein_target[valid] / PLAN_PROTEIN_STEP) * PLAN_PROTEIN_STEP], axis=1).astype(np.int64)
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True) if len(keys) else (keys, np.empty(0, int))
+    results = [_plan_for(int(c), int(p)) for c, p in unique]
+    rows = np.flatnonzero(valid)
+    for row, which in zip(rows, inverse.ravel()):
+        plans[row], cals[row], pros[row] = results[which]
+    return {"plan": plans, "plan_calories": cals, "plan_protein": pros}
+
+
+def process_chunk(columns: dict, with_plans: bool = False, today: date = None) -> dict:
+    out = dict(columns)
+    results = compute_targets(columns, today)
+    error = results.pop("error")
+    out.update(results)
+    if with_plans:
+        out.update(compute_plans(results["target_cals"], results["protein_target"]))
+    out["error"] = error
+    return out
+
+
+# -------------------------------
+# Streaming I/O
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def _pyarrow():
+    # pyarrow is optional: required for Parquet, used for faster CSV when present
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        return None
+
+
+def _require_pyarrow():
+    if _pyarrow() is None:
+        raise RuntimeError("Parquet input/output needs pyarrow (pip install pyarrow)")
+
+
+def _batch_columns(batch) -> dict:
+    return {name: batch.column(i).to_numpy(zero_copy_only=False) for i, name in enumerate(batch.schema.names)}
+
+
+def read_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    # Yields {column: list or array} chunks of at most chunk_size rows
+    if _is_parquet(path):
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield _batch_columns(batch)
+        return
+
+    with open(path, newline="", encoding="utf-8") as f:
+        header = [h.strip() for h in next(csv.reader(f), [])]
+    missing = [c for c in INPUT_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"{path}: missing columns {', '.join(missing)}")
+
+    pa = _pyarrow()
+    if pa is not None:
+        import pyarrow.csv as pacsv
+        # Everything as text; compute_targets does its own parsing
+        reader = pacsv.open_csv(path, convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in header}, strings_can_be_null=False))
+        for batch in reader:
+            for start in range(0, batch.num_rows, chunk_size):
+                yield _batch_columns(batch.slice(start, chunk_size))
+        return
+
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) == chunk_size:
+                yield dict(zip(header, map(list, zip(*rows))))
+                rows = []
+        if rows:
+            yield dict(zip(header, map(list, zip(*rows))))
+
+
+def _arrow_table(chunk: dict):
+    import pyarrow as pa
+    columns = {}
+    for name, values in chunk.items():
+        if isinstance(values, np.ndarray) and values.dtype.kind == "f":
+            # NaN -> null
+            column = pa.array(values.astype(np.float64), from_pandas=True)
+            columns[name] = column.cast(pa.int64()) if name in INTEGER_COLUMNS else column
+        else:
+            columns[name] = pa.array(values.tolist() if isinstance(values, np.ndarray) else values)
+    return pa.table(columns)
+
+
+def _csv_column(name: str, values):
+    # NaN -> empty cell; integer columns (age) written without ".0"
+    if isinstance(values, np.ndarray) and values.dtype.kind == "f":
+        fmt = "{:.0f}".format if name in INTEGER_COLUMNS else repr
+        return ["" if v != v else fmt(v) for v in values.tolist()]
+    return values.tolist() if isinstance(values, np.ndarray) else values
+
+
+class ChunkWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.parquet = _is_parquet(path)
+        self._file = self._csv = self._arrow = self._schema = None
+        self.rows = 0
+
+    def write(self, chunk: dict):
+        names = list(chunk)
+        if self.parquet or _pyarrow() is not None:
+            self._write_arrow(_arrow_table(chunk))
+        else:
+            if self._csv is None:
+                self._file = open(self.path, "w", newline="", encoding="utf-8")
+                self._csv = csv.writer(self._file)
+                self._csv.writerow(names)
+            self._csv.writerows(zip(*[_csv_column(k, chunk[k]) for k in names]))
+        self.rows += len(chunk[names[0]]) if names else 0
+
+    def _write_arrow(self, table):
+        if self._arrow is None:
+            self._schema = table.schema
+            if self.parquet:
+                import pyarrow.parquet as pq
+                self._arrow = pq.ParquetWriter(self.path, self._schema)
+            else:
+                import pyarrow.csv as pacsv
+                self._arrow = pacsv.CSVWriter(self.path, self._schema)
+        self._arrow.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._arrow is not None:
+            self._arrow.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run(input_path: str, output_path: str, with_plans: bool = False, workers: int = 0,
+        chunk_size: int = DEFAULT_CHUNK_SIZE, today: date = None) -> int:
+    # Returns the number of rows written. workers > 1 uses a process pool;
+    # chunks are written in input order with a bounded number in flight.
+    today = today or date.today()
+    chunks = read_chunks(input_path, chunk_size)
+    with ChunkWriter(output_path) as writer:
+        if workers and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(process_chunk, chunk, with_plans, today))
+                    if len(pending) >= workers * 2:
+                        writer.write(pending.popleft().result())
+                while pending:
+                    writer.write(pending.popleft().result())
+        else:
+            for chunk in chunks:
+                writer.write(process_chunk(chunk, with_plans, today))
+    return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute daily targets (and plans) for a file of users.")
+    parser.add_argument("input", help="CSV or Parquet with columns: " + ", ".join(INPUT_COLUMNS))
+    parser.add_argument("output", help="CSV or Parquet output path")
+    parser.add_argument("--plans", action="store_true", help="also generate a meal plan per row")
+    parser.add_argument("--workers", type=int, default=0, help="process pool size (default: in-process)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--today", type=date.fromisoformat, default=None, help="reference date for ages (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rows = run(args.input, args.output, args.plans, args.workers, args.chunk_size, args.today)
+    elapsed = time.perf_counter() - start
+    print(f"{rows} rows -> {args.output} in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
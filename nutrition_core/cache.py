@@ -0,0 +1,103 @@
+# cache.py
+# Small process-wide result cache: LRU order, optional TTL, a bound on the
+# (estimated) memory held, and hit/miss/eviction counters. Thread-safe, no
+# Streamlit dependency, so the app, the HTTP server and batch jobs share it.
+# Cached values are shared between callers: treat them as read-only.
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+CacheStats = namedtuple("CacheStats", ["hits", "misses", "evictions", "expired", "entries", "bytes"])
+
+
+def approx_size(value, _seen=None) -> int:
+    # Deep sys.getsizeof over the containers results are made of
+    _seen = set() if _seen is None else _seen
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_size(k, _seen) + approx_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approx_size(v, _seen) for v in value)
+    elif hasattr(value, "nbytes"):
+        size += int(value.nbytes)
+    return size
+
+
+class ResultCache:
+    def __init__(self, maxsize: int = 4096, ttl: float = None, max_bytes: int = 64 << 20):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()      # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = self.expired = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= time.monotonic():
+                self._drop(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, value):
+        size = approx_size(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires_at, size, value)
+            self._bytes += size
+            while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        # compute() runs outside the lock; two threads missing the same key
+        # may both compute it, and the second result wins
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, self.expired, len(self._entries), self._bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def collector(self, name: str):
+        # For metrics.register_collector: this cache's stats as Prometheus samples
+        def collect():
+            stats, labels = self.stats(), {"cache": name}
+            return [("cache_hits_total", "counter", "Cache hits.", labels, stats.hits),
+                    ("cache_misses_total", "counter", "Cache misses.", labels, stats.misses),
+                    ("cache_evictions_total", "counter", "Entries evicted for size.", labels, stats.evictions),
+                    ("cache_entries", "gauge", "Entries held.", labels, stats.entries),
+                    ("cache_bytes", "gauge", "Approximate bytes held.", labels, stats.bytes)]
+        return collect
@@ -0,0 +1,216 @@
+# charts.py
+# Food and plan charts, rendered once and reused. Two renderers:
+#   - Vega-Lite specs (plain dicts; st.vega_lite_chart draws them in the
+#     browser, no matplotlib needed)
+#   - PNG/SVG bytes from matplotlib, kept in a bounded LRU keyed by the
+#     chart's content. Figures are created without pyplot and closed right
+#     after rendering, so nothing accumulates in a long-lived server.
+# matplotlib is imported on first PNG/SVG render only.
+import math
+from copy import deepcopy
+from functools import lru_cache
+from io import BytesIO
+
+from . import metrics
+
+CHART_CACHE_SIZE = 256
+CALORIES_COLOR = "#FF6347"
+PROTEIN_COLOR = "#4682B4"
+FORMATS = ("png", "svg")
+
+
+# -------------------------------
+# Cache keys: everything a chart shows, as hashable tuples
+def _food_key(lookup) -> tuple:
+    # lookup: FoodLookup (name, query, grams, calories, protein, tip)
+    return lookup.name, float(lookup.grams), round(float(lookup.calories), 1), round(float(lookup.protein), 1)
+
+
+def _plan_key(summary) -> tuple:
+    # summary: PlanSummary; one (meal, ((food, grams, kcal, protein), ...)) entry per meal
+    return tuple((meal, tuple((fk, g, round(cal, 1), round(pro, 1)) for fk, g, cal, pro in items))
+                 for meal, items in summary.items.items())
+
+
+# -------------------------------
+# Vega-Lite
+# Callers get a copy, so whatever the front end does to a spec can't leak into the cache
+def food_chart_spec(lookup) -> dict:
+    return deepcopy(_food_spec(_food_key(lookup)))
+
+
+def plan_chart_spec(summary) -> dict:
+    return deepcopy(_plan_spec(_plan_key(summary)))
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def _food_spec(key: tuple) -> dict:
+    name, grams, calories, protein = key
+    return {
+        "title": f"Nutritional Breakdown — {name} ({grams:g} g)",
+        "data": {"values": [{"nutrient": "Calories (kcal)", "value": calories},
+                            {"nutrient": "Protein (g)", "value": protein}]},
+        "mark": "bar",
+        "encoding": {
+            "x": {"field": "nutrient", "type": "nominal", "title": None, "axis": {"labelAngle": 0}},
+            "y": {"field": "value", "type": "quantitative", "title": None},
+            "color": {"field": "nutrient", "type": "nominal", "legend": None,
+                      "scale": {"range": [CALORIES_COLOR, PROTEIN_COLOR]}},
+            "tooltip": [{"field": "nutrient"}, {"field": "value"}],
+        },
+    }
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def _plan_spec(key: tuple) -> dict:
+    rows = [{"meal": meal, "food": fk, "grams": g, "calories": cal, "protein": pro}
+            for meal, items in key for fk, g, cal, pro in items]
+    order = [meal for meal, _ in key]
+    return {
+        "title": "Plan breakdown by meal",
+        "data": {"values": rows},
+        "hconcat": [
+            {"mark": "bar", "width": 260,
+             "encoding": {"x": {"field": "meal", "type": "nominal", "sort": order, "title": None,
+                                "axis": {"labelAngle": 0}},
+                          "y": {"aggregate": "sum", "field": field, "type": "quantitative", "title": title},
+                          "color": {"field": "food", "type": "nominal", "legend": None},
+                          "tooltip": [{"field": "meal"}, {"field": "food"}, {"field": "grams"},
+                                      {"field": field}]}}
+            for field, title in (("calories", "kcal"), ("protein", "protein (g)"))
+        ],
+    }
+
+
+def diary_chart_spec(history) -> dict:
+    # history: diary.DayTotals rows; daily calories with the rolling 7-day average.
+    # Not cached: the diary changes with every logged item.
+    rows = [{"day": t.day, "calories": round(t.calories, 1), "7-day average": round(t.week_calories / 7, 1)}
+            for t in history]
+    return {
+        "title": "Calories per day",
+        "data": {"values": rows},
+        "transform": [{"fold": ["calories", "7-day average"], "as": ["series", "kcal"]}],
+        "mark": {"type": "line", "point": True},
+        "encoding": {
+            "x": {"field": "day", "type": "temporal", "title": None},
+            "y": {"field": "kcal", "type": "quantitative", "title": "kcal"},
+            "color": {"field": "series", "type": "nominal", "title": None,
+                      "scale": {"range": [CALORIES_COLOR, PROTEIN_COLOR]}},
+            "tooltip": [{"field": "day", "type": "temporal"}, {"field": "series"}, {"field": "kcal"}],
+        },
+    }
+
+
+def projection_chart_spec(projection, start, days: int, goal_weight: float = None, highlight: int = None,
+                          max_points: int = 200) -> dict:
+    # projection: trajectory.Projection; one line per scenario over the first `days` days,
+    # thinned to at most max_points per line, ending where the projection does (NaN).
+    # Not cached: cheap, and inputs are floats.
+    from datetime import timedelta
+    step = max(1, -(-days // max_points))
+    index = list(range(0, days + 1, step))
+    if index[-1] != days:
+        index.append(days)
+    dates = [(start + timedelta(days=d)).isoformat() for d in index]
+    rows = []
+    for s, (scenario, weights) in enumerate(zip(projection.scenarios, projection.weights[:, index].tolist())):
+        label = f"{scenario.activity.split(' (')[0]}, {scenario.adjustment:+.0f} kcal"
+        rows += [{"day": d, "weight": round(w, 2), "scenario": label, "selected": s == highlight}
+                 for d, w in zip(dates, weights) if not math.isnan(w)]
+    layers = [{
+        "mark": {"type": "line"},
+        "encoding": {
+            "x": {"field": "day", "type": "temporal", "title": None},
+            "y": {"field": "weight", "type": "quantitative", "title": "kg", "scale": {"zero": False}},
+            "color": {"field": "scenario", "type": "nominal", "title": None},
+            "strokeWidth": {"field": "selected", "type": "nominal", "legend": None,
+                            "scale": {"domain": [False, True], "range": [1.5, 4]}},
+            "tooltip": [{"field": "day", "type": "temporal"}, {"field": "scenario"}, {"field": "weight"}],
+        },
+    }]
+    if goal_weight is not None:
+        layers.append({"data": {"values": [{"goal": goal_weight}]},
+                       "mark": {"type": "rule", "strokeDash": [6, 4], "color": "gray"},
+                       "encoding": {"y": {"field": "goal", "type": "quantitative"}}})
+    return {"title": "Projected weight", "data": {"values": rows}, "layer": layers}
+
+
+# -------------------------------
+# matplotlib -> PNG/SVG bytes
+def food_chart_image(lookup, fmt: str = "png") -> bytes:
+    return _food_image(_food_key(lookup), fmt)
+
+
+def plan_chart_image(summary, fmt: str = "png") -> bytes:
+    return _plan_image(_plan_key(summary), fmt)
+
+
+def _figure(width: float, height: float, ncols: int = 1):
+    # A Figure that pyplot doesn't track, so it is freed as soon as we drop it
+    from matplotlib.figure import Figure
+    metrics.count("figures_created")
+    fig = Figure(figsize=(width, height))
+    return fig, fig.subplots(1, ncols)
+
+
+def _render(fig, fmt: str) -> bytes:
+    if fmt not in FORMATS:
+        raise ValueError(f"unsupported chart format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    buf = BytesIO()
+    try:
+        with metrics.span("chart.render"):
+            fig.savefig(buf, format=fmt, bbox_inches="tight")
+    finally:
+        fig.clear()
+    return buf.getvalue()
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def _food_image(key: tuple, fmt: str) -> bytes:
+    name, grams, calories, protein = key
+    fig, ax = _figure(6.4, 4.8)
+    ax.bar(["Calories (kcal)", "Protein (g)"], [calories, protein], color=[CALORIES_COLOR, PROTEIN_COLOR])
+    ax.set_title("Nutritional Breakdown")
+    return _render(fig, fmt)
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def _plan_image(key: tuple, fmt: str) -> bytes:
+    fig, axes = _figure(9.0, 4.0, ncols=2)
+    meals = [meal for meal, _ in key]
+    for ax, column, color, title in ((axes[0], 2, CALORIES_COLOR, "Calories (kcal)"),
+                                     (axes[1], 3, PROTEIN_COLOR, "Protein (g)")):
+        # One stacked segment per planned item, labelled with the food
+        for x, (meal, items) in enumerate(key):
+            bottom = 0.0
+            for i, item in enumerate(items):
+                value = item[column]
+                ax.bar(x, value, bottom=bottom, color=color, alpha=1.0 - 0.25 * (i % 3), edgecolor="white")
+                if value > 0:
+                    ax.text(x, bottom + value / 2, item[0], ha="center", va="center", fontsize=7)
+                bottom += value
+        ax.set_xticks(range(len(meals)), meals)
+        ax.set_title(title)
+    return _render(fig, fmt)
+
+
+def cache_info() -> dict:
+    # lru_cache statistics per chart kind (hits, misses, size)
+    return {name: f.cache_info() for name, f in (("food_spec", _food_spec), ("plan_spec", _plan_spec),
+                                                  ("food_image", _food_image), ("plan_image", _plan_image))}
+
+
+def _collect():
+    return [sample for name, info in cache_info().items() for sample in (
+        ("cache_hits_total", "counter", "Cache hits.", {"cache": "chart_" + name}, info.hits),
+        ("cache_misses_total", "counter", "Cache misses.", {"cache": "chart_" + name}, info.misses),
+        ("cache_entries", "gauge", "Entries held.", {"cache": "chart_" + name}, info.currsize))]
+
+
+metrics.register_collector(_collect)
+
+
+def clear_cache():
+    for f in (_food_spec, _plan_spec, _food_image, _plan_image):
+        f.cache_clear()
@@ -0,0 +1,245 @@
+# diary.py
+# Food diary in SQLite. Logged items are buffered and written in batches;
+# each flush folds its per-day deltas into a `daily` table that also keeps
+# rolling 7- and 30-day totals for every logged day, so dashboards read a
+# handful of rows instead of re-adding every entry.
+#
+#   entries(id, user, day, logged_at, food, grams, calories, protein, meal)
+#   daily(user, day, calories, protein, entries,
+#         week_calories, week_protein, month_calories, month_protein)
+#
+# week_* / month_* on a row are the totals over the WEEK_DAYS / MONTH_DAYS
+# days ending on that day (inclusive). Calories and protein are stored as
+# logged, so later changes to the food table don't rewrite history.
+import atexit
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+WEEK_DAYS = 7
+MONTH_DAYS = 30
+BATCH_SIZE = 256        # pending entries that trigger a flush
+FLUSH_INTERVAL = 2.0    # seconds a pending entry may wait before the next log() flushes
+DEFAULT_PATH = os.environ.get("NUTRITION_DIARY",
+                              os.path.join(os.path.expanduser("~"), ".nutrition", "diary.sqlite"))
+
+DiaryEntry = namedtuple("DiaryEntry", ["id", "user", "day", "food", "grams", "calories", "protein", "meal"])
+DayTotals = namedtuple("DayTotals", ["day", "calories", "protein", "entries", "week_calories", "week_protein",
+                                     "month_calories", "month_protein"])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    day TEXT NOT NULL,
+    logged_at REAL NOT NULL,
+    food TEXT NOT NULL,
+    grams REAL NOT NULL,
+    calories REAL NOT NULL,
+    protein REAL NOT NULL,
+    meal TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_user_day ON entries (user, day);
+CREATE TABLE IF NOT EXISTS daily (
+    user TEXT NOT NULL,
+    day TEXT NOT NULL,
+    calories REAL NOT NULL DEFAULT 0,
+    protein REAL NOT NULL DEFAULT 0,
+    entries INTEGER NOT NULL DEFAULT 0,
+    week_calories REAL NOT NULL DEFAULT 0,
+    week_protein REAL NOT NULL DEFAULT 0,
+    month_calories REAL NOT NULL DEFAULT 0,
+    month_protein REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (user, day)
+) WITHOUT ROWID;
+"""
+
+
+def _day(value) -> str:
+    if value is None:
+        return date.today().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return date.fromisoformat(str(value)).isoformat()
+
+
+def _shift(day: str, days: int) -> str:
+    return (date.fromisoformat(day) + timedelta(days=days)).isoformat()
+
+
+class FoodDiary:
+    def __init__(self, path: str = DEFAULT_PATH, catalog=None, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._catalog = catalog
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        self._pending = []          # (user, day, logged_at, food, grams, meal)
+        self._oldest = None
+
+    @property
+    def catalog(self):
+        if self._catalog is None:
+            from .lookup import default_catalog
+            self._catalog = default_catalog()
+        return self._catalog
+
+    # -------------------------------
+    # Writes
+    def _check(self, food: str, grams: float, meal: str = None) -> str:
+        name = self.catalog.resolve(food)
+        if name is None:
+            raise ValueError(f"unknown food: {food!r}")
+        if not (math.isfinite(grams) and grams > 0):
+            raise ValueError("grams must be a positive finite number")
+        if meal is not None and not isinstance(meal, str):
+            raise ValueError("meal must be a string")
+        return name
+
+    def log(self, user: str, food: str, grams: float, day=None, meal: str = None) -> str:
+        # Queue one item; returns the catalog name it resolved to. Raises ValueError for unknown foods.
+        name = self._check(food, grams, meal)
+        with self._lock:
+            now = time.time()
+            self._pending.append((user, _day(day), now, name, float(grams), meal))
+            self._oldest = self._oldest or now
+            if len(self._pending) >= self.batch_size or now - self._oldest >= self.flush_interval:
+                self.flush()
+        return name
+
+    def log_many(self, user: str, items, day=None, meal: str = None) -> list:
+        # items: (food, grams) pairs, flushed together; all are checked first, so a
+        # ValueError on any of them logs none
+        items = [(self._check(food, grams, meal), float(grams)) for food, grams in items]
+        day = _day(day)
+        with self._lock:
+            now = time.time()
+            self._pending += [(user, day, now, name, grams, meal) for name, grams in items]
+            self.flush()
+        return [name for name, _ in items]
+
+    def flush(self) -> int:
+        # Write pending entries and their aggregate deltas in one transaction; they
+        # stay queued if it fails
+        with self._lock:
+            pending = self._pending
+            if not pending:
+                return 0
+            calories, protein = self.catalog.estimate_servings([(row[3], row[4]) for row in pending])
+            rows = [(user, day, logged_at, food, grams, round(cal, 2), round(pro, 2), meal)
+                    for (user, day, logged_at, food, grams, meal), cal, pro
+                    in zip(pending, calories.tolist(), protein.tolist())]
+            deltas = {}
+            for user, day, _, _, _, cal, pro, _ in rows:
+                d = deltas.setdefault((user, day), [0.0, 0.0, 0])
+                d[0] += cal
+                d[1] += pro
+                d[2] += 1
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany("INSERT INTO entries (user, day, logged_at, food, grams, calories, protein, meal)"
+                                     " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                for (user, day), (cal, pro, n) in deltas.items():
+                    self._apply(user, day, cal, pro, n)
+            self._pending, self._oldest = [], None
+            return len(rows)
+
+    def remove(self, entry_id: int) -> bool:
+        with self._lock:
+            self.flush()
+            row = self._db.execute("SELECT user, day, calories, protein FROM entries WHERE id = ?",
+                                   (entry_id,)).fetchone()
+            if row is None:
+                return False
+            user, day, cal, pro = row
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+                self._apply(user, day, -cal, -pro, -1)
+            return True
+
+    def _apply(self, user: str, day: str, cal: float, pro: float, n: int):
+        # Fold one day's delta into its daily row and the rolling windows that cover it
+        db = self._db
+        db.execute("INSERT INTO daily (user, day, calories, protein, entries) VALUES (?, ?, ?, ?, ?)"
+                   " ON CONFLICT (user, day) DO UPDATE SET calories = calories + excluded.calories,"
+                   " protein = protein + excluded.protein, entries = entries + excluded.entries",
+                   (user, day, cal, pro, n))
+        # Later days whose windows include this day
+        db.execute("UPDATE daily SET week_calories = week_calories + ?, week_protein = week_protein + ?"
+                   " WHERE user = ? AND day > ? AND day <= ?", (cal, pro, user, day, _shift(day, WEEK_DAYS - 1)))
+        db.execute("UPDATE daily SET month_calories = month_calories + ?, month_protein = month_protein + ?"
+                   " WHERE user = ? AND day > ? AND day <= ?", (cal, pro, user, day, _shift(day, MONTH_DAYS - 1)))
+        # This day's own windows, from at most MONTH_DAYS rows
+        db.execute("UPDATE daily SET"
+                   " week_calories = (SELECT SUM(calories) FROM daily d WHERE d.user = ?1 AND d.day BETWEEN ?3 AND ?2),"
+                   " week_protein = (SELECT SUM(protein) FROM daily d WHERE d.user = ?1 AND d.day BETWEEN ?3 AND ?2),"
+                   " month_calories = (SELECT SUM(calories) FROM daily d WHERE d.user = ?1 AND d.day BETWEEN ?4 AND ?2),"
+                   " month_protein = (SELECT SUM(protein) FROM daily d WHERE d.user = ?1 AND d.day BETWEEN ?4 AND ?2)"
+                   " WHERE user = ?1 AND day = ?2",
+                   (user, day, _shift(day, 1 - WEEK_DAYS), _shift(day, 1 - MONTH_DAYS)))
+        db.execute("DELETE FROM daily WHERE user = ? AND day = ? AND entries <= 0", (user, day))
+
+    # -------------------------------
+    # Reads (pending entries are flushed first)
+    def entries(self, user: str, day=None) -> list:
+        with self._lock:
+            self.flush()
+            rows = self._db.execute("SELECT id, user, day, food, grams, calories, protein, meal FROM entries"
+                                    " WHERE user = ? AND day = ? ORDER BY id", (user, _day(day))).fetchall()
+        return [DiaryEntry(*row) for row in rows]
+
+    def day_totals(self, user: str, day=None) -> DayTotals:
+        # Totals for one day; days without entries still get their rolling windows
+        day = _day(day)
+        rows = self.history(user, _shift(day, 1 - MONTH_DAYS), day)
+        if rows and rows[-1].day == day:
+            return rows[-1]
+        week_start = _shift(day, 1 - WEEK_DAYS)
+        return DayTotals(day, 0.0, 0.0, 0,
+                         sum((r.calories for r in rows if r.day >= week_start), 0.0),
+                         sum((r.protein for r in rows if r.day >= week_start), 0.0),
+                         sum((r.calories for r in rows), 0.0), sum((r.protein for r in rows), 0.0))
+
+    def history(self, user: str, start=None, end=None) -> list:
+        # DayTotals for every logged day in [start, end], oldest first
+        with self._lock:
+            self.flush()
+            rows = self._db.execute(
+                "SELECT day, calories, protein, entries, week_calories, week_protein, month_calories, month_protein"
+                " FROM daily WHERE user = ? AND day BETWEEN ? AND ? ORDER BY day",
+                (user, _day(start) if start else "0000-00-00", _day(end) if end else "9999-99-99")).fetchall()
+        return [DayTotals(*row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_diary = None
+
+
+def default_diary() -> FoodDiary:
+    global _default_diary
+    if _default_diary is None:
+        _default_diary = FoodDiary()
+        atexit.register(_default_diary.flush)
+    return _default_diary
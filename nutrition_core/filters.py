@@ -0,0 +1,150 @@
+# filters.py
+# Condition-aware food queries over the whole catalog. Built once per store:
+#   - a packed bitset (np.packbits, 1 bit per food) per health condition and
+#     per category, from the nutrient rules below (or CONDITION_EXCLUDES when the
+#     store lacks those nutrients, as in the meal planner)
+#   - a sorted index per nutrient, so "calories <= 300" is one searchsorted
+# A query ANDs the bitsets it needs, e.g. diabetes + high_bp + under 300 kcal:
+#   FoodFilter.from_store(store).query(["diabetes", "high_bp"], max_calories=300)
+# All nutrient values are per 100 g (sodium/potassium in mg; gi 0-100, 0 for
+# foods without carbohydrate).
+import numpy as np
+
+# Per-condition rules, all of which must hold: (nutrient, "<=" or ">=", value).
+# A rule may be a tuple of alternatives, any one of which is enough.
+CONDITION_RULES = {
+    # Low glycemic index (or hardly any carbohydrate), not sugar-heavy
+    "diabetes": ((("gi", "<=", 55), ("carbs", "<=", 10)), ("sugar", "<=", 15)),
+    # Low sodium
+    "high_bp": (("sodium", "<=", 300),),
+    # Salt and regular meals are encouraged; nothing to exclude
+    "low_bp": (),
+}
+
+# Foods / categories left out for each condition instead, for stores without the
+# nutrient columns its rules need (e.g. calories/protein only)
+CONDITION_EXCLUDES = {
+    "diabetes": {"categories": {"sweets", "fast food"}, "foods": {"bread"}},
+    "high_bp": {"categories": {"fast food"}, "foods": {"cheese"}},
+    "low_bp": {"categories": set(), "foods": set()},
+}
+
+
+# Display names and units for describe_rules (grams unless listed)
+NUTRIENT_LABELS = {"gi": ("glycemic index", ""), "sodium": ("sodium", " mg"), "potassium": ("potassium", " mg")}
+
+
+def _describe(rule) -> str:
+    if isinstance(rule[0], tuple):
+        return " or ".join(_describe(alternative) for alternative in rule)
+    nutrient, op, value = rule
+    label, unit = NUTRIENT_LABELS.get(nutrient, (nutrient, " g"))
+    return f"{label} {'≤' if op == '<=' else '≥'} {value:g}{unit}"
+
+
+def describe_rules(condition: str) -> str:
+    # "glycemic index ≤ 55 or carbs ≤ 10 g, sugar ≤ 15 g"; "" for a condition without rules
+    return ", ".join(_describe(rule) for rule in CONDITION_RULES[condition])
+
+
+def _nutrients(rule) -> list:
+    if isinstance(rule[0], tuple):
+        return [nutrient for alternative in rule for nutrient in _nutrients(alternative)]
+    return [rule[0]]
+
+
+def _rule_mask(columns: dict, rule) -> np.ndarray:
+    if isinstance(rule[0], tuple):
+        return np.logical_or.reduce([_rule_mask(columns, alternative) for alternative in rule])
+    nutrient, op, value = rule
+    column = columns[nutrient]
+    return column <= value if op == "<=" else column >= value
+
+
+def condition_mask(store, condition: str) -> np.ndarray:
+    # Boolean mask of foods suitable for condition: its nutrient rules, or its
+    # CONDITION_EXCLUDES when the store lacks the nutrients they need
+    rules = CONDITION_RULES.get(condition)
+    if rules is None:
+        raise KeyError(f"unknown condition {condition!r}")
+    mask = np.ones(len(store), dtype=bool)
+    if all(nutrient in store.columns for rule in rules for nutrient in _nutrients(rule)):
+        for rule in rules:
+            mask &= _rule_mask(store.columns, rule)
+        return mask
+    excludes = CONDITION_EXCLUDES.get(condition, {})
+    categories = store.text.get("category")
+    if categories is not None and excludes.get("categories"):
+        mask &= ~np.isin(np.asarray(list(categories), dtype=object), list(excludes["categories"]))
+    for name in excludes.get("foods", ()):
+        food_id = store.id_of(name)
+        if food_id >= 0:
+            mask[food_id] = False
+    return mask
+
+
+class FoodFilter:
+    def __init__(self, store, rules=CONDITION_RULES):
+        self.store = store
+        self.n = len(store)
+        self.conditions = {}
+        for condition in rules:
+            self.conditions[condition] = np.packbits(condition_mask(store, condition))
+        categories = store.text.get("category")
+        self.categories = {}
+        if categories is not None:
+            labels = np.asarray(list(categories), dtype=object)
+            for category in dict.fromkeys(labels):
+                self.categories[category] = np.packbits(labels == category)
+        # nutrient -> (food ids ordered by value, values in that order)
+        self._sorted = {}
+        for nutrient, column in store.columns.items():
+            order = np.argsort(column, kind="stable")
+            self._sorted[nutrient] = (order, column[order])
+        self._all = np.packbits(np.ones(self.n, dtype=bool))
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(store)
+
+    def _range_bits(self, nutrient: str, low=None, high=None) -> np.ndarray:
+        # Foods with low <= value <= high, from the sorted index
+        order, values = self._sorted[nutrient]
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        stop = self.n if high is None else np.searchsorted(values, high, side="right")
+        mask = np.zeros(self.n, dtype=bool)
+        mask[order[start:stop]] = True
+        return np.packbits(mask)
+
+    def bits(self, conditions=(), max_calories=None, categories=(), ranges=None) -> np.ndarray:
+        # Packed bitset of foods matching every condition, any of the categories, and every range
+        bits = self._all.copy()
+        for condition in conditions:
+            if condition not in self.conditions:
+                raise KeyError(f"unknown condition {condition!r}")
+            bits &= self.conditions[condition]
+        if categories:
+            any_category = np.zeros_like(bits)
+            for category in categories:
+                if category in self.categories:
+                    any_category |= self.categories[category]
+            bits &= any_category
+        if max_calories is not None:
+            bits &= self._range_bits("calories", high=max_calories)
+        for nutrient, (low, high) in (ranges or {}).items():
+            bits &= self._range_bits(nutrient, low, high)
+        return bits
+
+    def query(self, conditions=(), max_calories=None, categories=(), ranges=None, sort_by="calories",
+              limit=None) -> np.ndarray:
+        # Matching food ids, ordered by sort_by (ascending; prefix with "-" for descending)
+        mask = np.unpackbits(self.bits(conditions, max_calories, categories, ranges), count=self.n).view(bool)
+        if not sort_by:
+            ids = np.flatnonzero(mask)
+        else:
+            # Walk the presorted index instead of sorting the matches
+            order, _ = self._sorted[sort_by.lstrip("-")]
+            ids = order[mask[order]]
+            if sort_by.startswith("-"):
+                ids = ids[::-1]
+        return ids if limit is None else ids[:limit]
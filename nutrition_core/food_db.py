@@ -0,0 +1,198 @@
+# food_db.py
+# Compact binary food database, opened with mmap so only the pages that are
+# touched get read. Startup cost is a header parse regardless of catalog size.
+#
+# Layout (little-endian):
+#   header   magic "FDB1", version, food count, nutrient count, text column
+#            count, section offsets, then one offset per text column
+#   meta     utf-8, newline-separated nutrient names then text column names
+#   names    string table, rows sorted by utf-8 name so lookups can bisect
+#   table    float32 [n_nutrients, n_foods], values per 100g
+#   text     one string table per text column ("" = no value)
+#
+# A string table is (n + 1) uint32 offsets followed by the utf-8 blob.
+import argparse
+import csv
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Sequence
+
+import numpy as np
+
+from .store import NutritionStore
+
+MAGIC = b"FDB1"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHIIIQQQ")  # magic, version, pad, n_foods, n_nutrients, n_text, meta/names/table offsets
+_ALIGN = 8
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_CSV = os.path.join(DATA_DIR, "foods.csv")
+DEFAULT_DB = os.path.join(DATA_DIR, "foods.fdb")
+# Compiled databases for read-only checkouts, private to the user
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                         "nutrition")
+
+
+# -------------------------------
+# Reading
+class StringTable(Sequence):
+    def __init__(self, buf, offset: int, count: int):
+        self._buf = buf
+        self._offsets = np.frombuffer(buf, dtype="<u4", count=count + 1, offset=offset)
+        self._blob = offset + 4 * (count + 1)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def raw(self, i: int) -> bytes:
+        return self._buf[self._blob + int(self._offsets[i]):self._blob + int(self._offsets[i + 1])]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.raw(i).decode("utf-8")
+
+    def find(self, key: str) -> int:
+        # Binary search; only valid for tables written in sorted order
+        target = key.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self.raw(lo) == target:
+            return lo
+        return -1
+
+
+def open_food_db(path: str) -> NutritionStore:
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, _, n_foods, n_nutrients, n_text, meta_at, names_at, table_at = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a food database (magic={magic!r}, version={version})")
+    text_at = struct.unpack_from(f"<{n_text}Q", buf, _HEADER.size)
+    meta = buf[meta_at:names_at].rstrip(b"\0").decode("utf-8").split("\n")
+    nutrients, text_columns = meta[:n_nutrients], meta[n_nutrients:n_nutrients + n_text]
+
+    names = StringTable(buf, names_at, n_foods)
+    table = np.frombuffer(buf, dtype="<f4", count=n_nutrients * n_foods, offset=table_at)
+    text = {col: StringTable(buf, at, n_foods) for col, at in zip(text_columns, text_at)}
+    return NutritionStore(names, nutrients, table.reshape(n_nutrients, n_foods), text=text, find=names.find)
+
+
+# -------------------------------
+# Writing
+def _pad(out: bytearray):
+    out.extend(b"\0" * (-len(out) % _ALIGN))
+
+
+def _string_table(values) -> bytes:
+    blobs = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(blobs) + 1, dtype="<u4")
+    np.cumsum([len(b) for b in blobs], out=offsets[1:])
+    return offsets.tobytes() + b"".join(blobs)
+
+
+def write_food_db(path: str, names, nutrients, values, text=None):
+    # names: list of food names; values: array-like [n_foods, n_nutrients]
+    # text: optional {column: list of str}
+    text = dict(text or {})
+    values = np.asarray(values, dtype="<f4").reshape(len(names), len(nutrients))
+    keys = [n.encode("utf-8") for n in names]
+    order = sorted(range(len(names)), key=keys.__getitem__)
+    for a, b in zip(order, order[1:]):
+        if keys[a] == keys[b]:
+            raise ValueError(f"duplicate food name: {names[a]!r}")
+
+    out = bytearray(_HEADER.size + 8 * len(text))
+    _pad(out)
+    meta_at = len(out)
+    out += "\n".join(list(nutrients) + list(text)).encode("utf-8")
+    _pad(out)
+    names_at = len(out)
+    out += _string_table([names[i] for i in order])
+    _pad(out)
+    table_at = len(out)
+    out += np.ascontiguousarray(values[order].T).tobytes()
+    text_at = []
+    for column in text.values():
+        _pad(out)
+        text_at.append(len(out))
+        out += _string_table([column[i] for i in order])
+
+    _HEADER.pack_into(out, 0, MAGIC, VERSION, 0, len(names), len(nutrients), len(text),
+                      meta_at, names_at, table_at)
+    struct.pack_into(f"<{len(text)}Q", out, _HEADER.size, *text_at)
+
+    # Write atomically so a running app never maps a half-written file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(out)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def import_csv(csv_path: str, db_path: str, text_columns=("category", "tip")):
+    # CSV columns: name, any text columns, then numeric nutrient columns (per 100g)
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        if "name" not in fields:
+            raise ValueError(f"{csv_path}: missing 'name' column")
+        text_cols = [c for c in fields if c in text_columns]
+        nutrients = [c for c in fields if c != "name" and c not in text_cols]
+        names, values, text = [], [], {c: [] for c in text_cols}
+        for row in reader:
+            names.append(row["name"].strip().lower())
+            values.append([float(row[n] or 0) for n in nutrients])
+            for c in text_cols:
+                text[c].append((row[c] or "").strip())
+    write_food_db(db_path, names, nutrients, values, text)
+
+
+def load_food_db(csv_path: str = DEFAULT_CSV, db_path: str = DEFAULT_DB) -> NutritionStore:
+    # Open the compiled database, rebuilding it first if the CSV is newer
+    if not os.path.exists(db_path) or os.path.getmtime(db_path) < os.path.getmtime(csv_path):
+        try:
+            import_csv(csv_path, db_path)
+        except OSError:
+            # Read-only checkout: compile into the user's cache dir instead
+            db_path = cached_db_path(csv_path)
+            if not os.path.exists(db_path):
+                import_csv(csv_path, db_path)
+    return open_food_db(db_path)
+
+
+def cached_db_path(csv_path: str) -> str:
+    # Per-user cache file named by a hash of the CSV's path and contents, so
+    # different catalogs never share a file and an edited CSV gets a new one
+    digest = hashlib.sha256(os.path.abspath(csv_path).encode("utf-8") + b"\0")
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+    return os.path.join(CACHE_DIR, f"foods-{digest.hexdigest()[:32]}.fdb")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a binary food database from a CSV file.")
+    parser.add_argument("csv_path")
+    parser.add_argument("db_path", nargs="?", default=DEFAULT_DB)
+    args = parser.parse_args()
+    import_csv(args.csv_path, args.db_path)
+    store = open_food_db(args.db_path)
+    print(f"Wrote {len(store)} foods x {len(store.nutrients)} nutrients to {args.db_path}")
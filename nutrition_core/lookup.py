@@ -0,0 +1,163 @@
+# lookup.py
+# Catalog: the food table plus the things built on it (search index, meal
+# planner), each created on first use. default_catalog() is the process-wide
+# instance every front end shares, and so is its cache of plan results.
+from collections import namedtuple
+
+from . import metrics
+from .advice import plan_feedback
+from .cache import ResultCache
+from .filters import FoodFilter
+from .food_db import DEFAULT_CSV, DEFAULT_DB, load_food_db
+from .meal_parser import MealParser
+from .plans import MealPlanner, summarize_plan
+from .search import FoodSearchIndex
+from .store import NutritionView, TipsView
+from .targets import daily_targets
+
+# name: catalog name the query resolved to; query: what was typed
+FoodLookup = namedtuple("FoodLookup", ["name", "query", "grams", "calories", "protein", "tip"])
+# Everything the Personal Plan tab shows for one set of inputs
+PersonalPlan = namedtuple("PersonalPlan", ["targets", "plan", "summary", "feedback"])
+
+# Plan results kept per catalog: entries, seconds, bytes
+RESULT_CACHE_SIZE = 4096
+RESULT_CACHE_TTL = 3600
+RESULT_CACHE_BYTES = 32 << 20
+
+
+class Catalog:
+    def __init__(self, store):
+        self.store = store
+        self.nutrition_dict = NutritionView(store)
+        self.health_tips = TipsView(store)
+        self._index = None
+        self._planner = None
+        self._filter = None
+        self._meal_parser = None
+        self.results = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_BYTES)
+
+    @classmethod
+    def load(cls, csv_path: str = DEFAULT_CSV, db_path: str = DEFAULT_DB):
+        return cls(load_food_db(csv_path, db_path))
+
+    @property
+    def index(self) -> FoodSearchIndex:
+        if self._index is None:
+            self._index = FoodSearchIndex.from_store(self.store)
+        return self._index
+
+    @property
+    def planner(self) -> MealPlanner:
+        if self._planner is None:
+            self._planner = MealPlanner(self.store)
+        return self._planner
+
+    @property
+    def filter(self) -> FoodFilter:
+        if self._filter is None:
+            self._filter = FoodFilter.from_store(self.store)
+        return self._filter
+
+    @property
+    def meal_parser(self) -> MealParser:
+        if self._meal_parser is None:
+            self._meal_parser = MealParser(self)
+        return self._meal_parser
+
+    # -------------------------------
+    # Food lookup
+    def resolve(self, query: str):
+        query = query.strip().lower()
+        if query in self.store:
+            return query
+        return self.index.resolve(query) if query else None
+
+    def lookup(self, query: str, grams: float):
+        # FoodLookup for the best match of query, or None
+        with metrics.span("lookup"):
+            name = self.resolve(query)
+            if name is None:
+                return None
+            calories, protein = self.estimate_from_serving(name, grams)
+            return FoodLookup(name, query.strip(), grams, calories, protein, self.small_health_tip(name))
+
+    def estimate_from_serving(self, food_key: str, gram: float):
+        totals = self.store.totals([self.store.id_of(food_key)], [gram])
+        return totals["calories"], totals["protein"]
+
+    def estimate_servings(self, servings):
+        # servings: list of (food_key, grams) -> per-item (calories, protein) arrays
+        ids = self.store.ids_of([fk for fk, _ in servings])
+        values = self.store.estimate(ids, [g for _, g in servings])
+        return values["calories"], values["protein"]
+
+    def parse_meal(self, text: str):
+        # MealEstimate for free text ("2 eggs, 200g rice and a cup of milk"), priced in one batch
+        return self.meal_parser.evaluate(text)
+
+    def small_health_tip(self, food_key: str):
+        return self.health_tips.get(food_key.lower(), None)
+
+    # -------------------------------
+    # Plans
+    def plan(self, target_cals: float, protein_target: float, exclude=(), conditions=()) -> dict:
+        names = [self.resolve(f) for f in exclude if f.strip()]
+        return self.planner.plan(target_cals, protein_target, [n for n in names if n], conditions)
+
+    def summarize(self, plan: dict):
+        return summarize_plan(self.store, plan)
+
+    # -------------------------------
+    # Memoized results (shared by every session/request; treat as read-only)
+    def _plan_options(self, exclude, conditions):
+        excluded = {self.resolve(f) for f in exclude if f.strip()}
+        return tuple(sorted(n for n in excluded if n)), tuple(sorted(set(conditions)))
+
+    def plan_summary(self, target_cals: float, protein_target: float, exclude=(), conditions=()):
+        # (plan, PlanSummary), cached on the rounded targets and normalized options
+        excluded, conditions = self._plan_options(exclude, conditions)
+        target_cals, protein_target = round(float(target_cals), 1), round(float(protein_target), 1)
+        return self.results.get_or_compute(
+            ("plan", target_cals, protein_target, excluded, conditions),
+            lambda: self._plan_summary(target_cals, protein_target, excluded, conditions))
+
+    def _plan_summary(self, target_cals, protein_target, excluded, conditions):
+        with metrics.span("plan.build"):
+            plan = self.planner.plan(target_cals, protein_target, list(excluded), conditions)
+            return plan, self.summarize(plan)
+
+    def personal_plan(self, gender: str, weight: float, height: float, age: int, goal: str,
+                      activity_label: str, exclude=(), conditions=()) -> PersonalPlan:
+        # Targets, plan, summary and feedback for one profile, cached on the normalized inputs
+        excluded, conditions = self._plan_options(exclude, conditions)
+        key = ("personal", gender.lower(), round(float(weight), 1), round(float(height), 1), int(age), goal,
+               activity_label, excluded, conditions)
+        with metrics.span("plan"):
+            return self.results.get_or_compute(key, lambda: self._personal_plan(
+                gender, float(weight), float(height), int(age), goal, activity_label, excluded, conditions))
+
+    def _personal_plan(self, gender, weight, height, age, goal, activity_label, excluded, conditions):
+        targets = daily_targets(gender, weight, height, age, goal, activity_label)
+        plan, summary = self.plan_summary(targets.target_cals, targets.protein_target, excluded, conditions)
+        feedback = plan_feedback(summary.calories, summary.protein, targets.target_cals, targets.protein_target)
+        return PersonalPlan(targets, plan, summary, feedback)
+
+
+_default_catalog = None
+
+
+def default_catalog() -> Catalog:
+    global _default_catalog
+    if _default_catalog is None:
+        _default_catalog = Catalog.load()
+        metrics.register_collector(_default_catalog.results.collector("results"))
+    return _default_catalog
+
+
+def estimate_from_serving(food_key: str, gram: float):
+    return default_catalog().estimate_from_serving(food_key, gram)
+
+
+def small_health_tip(food_key: str):
+    return default_catalog().small_health_tip(food_key)
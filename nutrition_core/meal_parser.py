@@ -0,0 +1,211 @@
+# meal_parser.py
+# Free-text meals -> catalog foods and grams, e.g.
+#   "2 eggs, 200g rice and a cup of milk"
+#   "Lunch: 1 1/2 cups cooked rice + grilled chicken (150 g)"
+# Text is split into lines and items, each item into quantity, unit and food
+# name with regexes compiled once at import. A unit is a mass (g, oz...), a
+# household volume (cup, tbsp...) converted with the food's density, or a
+# piece/slice using the food's typical piece weight. Parsed lines are memoized
+# per parser, and a whole text is priced in one vectorized store call, so a
+# pasted day's log of hundreds of lines costs about as much as its distinct lines.
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from . import metrics
+
+PARSE_CACHE_SIZE = 4096
+DEFAULT_PORTION = 100       # grams for a food named without an amount and no piece weight
+DEFAULT_PIECE = 50          # grams per piece/slice of a food without a piece weight
+MAX_COUNT = 20              # a unitless amount above this is grams ("rice 200"), not a count
+MAX_GRAMS = 10_000          # larger amounts are typos, not meals
+
+# Unit -> (kind, amount): "g" grams per unit, "ml" millilitres per unit, "piece" pieces per unit,
+# "serving" portions per unit (a piece where the food has one, else DEFAULT_PORTION)
+UNITS = {
+    "g": ("g", 1), "gram": ("g", 1), "gm": ("g", 1), "gr": ("g", 1), "kg": ("g", 1000), "kilo": ("g", 1000),
+    "oz": ("g", 28.35), "ounce": ("g", 28.35), "lb": ("g", 453.6), "pound": ("g", 453.6),
+    "ml": ("ml", 1), "millilitre": ("ml", 1), "milliliter": ("ml", 1), "l": ("ml", 1000), "litre": ("ml", 1000),
+    "liter": ("ml", 1000), "dl": ("ml", 100), "cl": ("ml", 10),
+    "cup": ("ml", 240), "mug": ("ml", 300), "glass": ("ml", 250), "bowl": ("ml", 300),
+    "tbsp": ("ml", 15), "tablespoon": ("ml", 15), "tsp": ("ml", 5), "teaspoon": ("ml", 5),
+    "scoop": ("ml", 60), "handful": ("g", 30),
+    "piece": ("piece", 1), "pc": ("piece", 1), "slice": ("piece", 1), "whole": ("piece", 1),
+    "bar": ("piece", 1), "serving": ("serving", 1), "portion": ("serving", 1), "plate": ("serving", 1),
+}
+_plural_units = {"glass": "glasses", "handful": "handfuls", "gm": "gms", "gr": "grs", "kg": "kgs", "lb": "lbs",
+                 "pc": "pcs", "tbsp": "tbsps", "tsp": "tsps"}
+UNIT_ALIASES = {alias: unit for unit in UNITS
+                for alias in (unit, _plural_units.get(unit, unit + "s"))}
+
+# Typical edible weight (g) of one piece of a catalog food; slice weights where that is how it's eaten
+PIECE_GRAMS = {
+    "apple": 182, "banana": 118, "orange": 131, "mango": 200, "pear": 178, "peach": 150, "kiwi": 69,
+    "papaya": 500, "pomegranate": 280, "strawberry": 12, "cherry": 8, "grapes": 5, "blueberry": 1.5,
+    "avocado": 150, "watermelon": 280, "pineapple": 85, "carrot": 61, "potato": 173, "tomato": 123,
+    "cucumber": 300, "onion": 110, "corn": 90, "broccoli": 150, "cabbage": 900,
+    "egg": 50, "bread": 30, "burger": 220, "pizza": 107, "sandwich": 150, "hotdog": 100, "cheese": 20,
+    "chocolate": 45, "ice cream": 66, "chicken": 170, "fish": 150, "tofu": 120, "beef": 170, "mutton": 170,
+    "fries": 117, "yogurt": 150, "milk": 250, "coffee": 240, "tea": 240,
+}
+# g/ml for volume measures; anything else counts as water (1 g/ml)
+DENSITY = {
+    "rice": 0.79, "pasta": 0.59, "oats": 0.34, "lentils": 0.84, "beans": 0.75, "peas": 0.6, "corn": 0.6,
+    "milk": 1.03, "yogurt": 1.03, "ice cream": 0.55, "cheese": 0.45, "spinach": 0.13, "broccoli": 0.38,
+    "cabbage": 0.37, "carrot": 0.54, "blueberry": 0.62, "strawberry": 0.6, "cherry": 0.65, "grapes": 0.64,
+    "pomegranate": 0.73, "pineapple": 0.7, "mango": 0.7, "watermelon": 0.64, "papaya": 0.59, "tofu": 1.0,
+}
+SIZES = {"small": 0.7, "medium": 1.0, "large": 1.3, "big": 1.3, "jumbo": 1.5}
+# Words that describe a food without changing what it is
+FILLER = {"of", "some", "fresh", "boiled", "cooked", "grilled", "baked", "steamed", "roasted", "raw", "plain",
+          "sliced", "chopped", "homemade", "organic", "my", "the", "x"}
+
+WORD_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+                "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "half": 0.5, "half a": 0.5,
+                "half an": 0.5, "quarter": 0.25, "a quarter": 0.25, "a couple of": 2, "couple of": 2,
+                "a couple": 2, "a few": 3, "few": 3, "a dozen": 12, "dozen": 12}
+FRACTIONS = {"½": 0.5, "¼": 0.25, "¾": 0.75, "⅓": 1 / 3, "⅔": 2 / 3}
+NON_ADDITIVE = {"gi"}      # per-food indices that don't sum over a meal
+MEALS = {"breakfast": "Breakfast", "brunch": "Breakfast", "lunch": "Lunch", "dinner": "Dinner",
+         "supper": "Dinner", "snack": "Snack", "snacks": "Snack"}
+
+
+def _alternation(words) -> str:
+    # Longest first, so "half a" wins over "half" and "tbsp" over "t..."
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+# Mixed and plain fractions before plain numbers, so "1 1/2" and "1/2" aren't read as "1"
+_NUMBER = r"\d+\s+\d+/\d+|\d+/\d+|\d*\s*[" + "".join(FRACTIONS) + r"]|\d+(?:[.,]\d+)?"
+_QUANTITY = rf"(?:{_NUMBER})|(?:{_alternation(WORD_NUMBERS)})(?=\s)"
+_UNIT = rf"(?:{_alternation(UNIT_ALIASES)})(?![a-z])\.?"
+_ITEM = re.compile(
+    rf"^(?:(?P<qty>{_QUANTITY})\s*(?:(?P<unit>{_UNIT})\s*)?(?:of\s+)?)?"
+    rf"(?P<name>.*?)"
+    rf"(?:\s*[-:(,]?\s*(?:x\s*)?(?P<qty2>{_NUMBER})\s*(?P<unit2>{_UNIT})?\s*\)?)?$")
+_SEPARATOR = re.compile(r"\s*(?:(?<!\d),|,(?!\d)|;|\+|&|\band\b|\bwith\b|\bplus\b)\s*")
+_LINE_PREFIX = re.compile(r"^\s*(?:[-*•·]+\s*|\d+[.)]\s+|\d{1,2}:\d{2}\s*(?:am|pm)?\s*[-–:]?\s*)*")
+_MEAL_LABEL = re.compile(rf"^({_alternation(MEALS)})\s*(?:[:\-–]\s*|$)")
+_SIZE = re.compile(rf"\b({_alternation(SIZES)})\b\s*")
+_WORD = re.compile(r"[a-z]+")
+
+# quantity/unit: as written (None when absent); food: catalog name or None; grams: None when unresolved;
+# guess: food is the closest spelling of the phrase, not an exact name, synonym or plural
+ParsedItem = namedtuple("ParsedItem", ["text", "food", "grams", "quantity", "unit", "meal", "guess"])
+# items: resolved ParsedItems; values: nutrient -> per-item array aligned with items;
+# totals: nutrient -> sum over items; unknown: items whose food didn't resolve
+MealEstimate = namedtuple("MealEstimate", ["items", "values", "totals", "unknown"])
+
+
+def parse_quantity(text: str) -> float:
+    text = text.strip().lower()
+    if text in WORD_NUMBERS:
+        return WORD_NUMBERS[text]
+    value = 0.0
+    for part in text.replace(",", ".").split():
+        if part[-1] in FRACTIONS:
+            value += (float(part[:-1]) if part[:-1] else 0.0) + FRACTIONS[part[-1]]
+        elif "/" in part:
+            num, den = part.split("/")
+            value += float(num) / float(den) if float(den) else 0.0
+        else:
+            value += float(part)
+    return value
+
+
+class MealParser:
+    def __init__(self, catalog, cache_size: int = PARSE_CACHE_SIZE):
+        self.catalog = catalog
+        self._line = lru_cache(maxsize=cache_size)(self._parse_line)
+        self._food = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _resolve(self, name: str):
+        # (catalog name, guess) for a food phrase: the whole phrase or one of its words (last first) by
+        # exact name, synonym or plural; else the index's guess for the whole phrase
+        words = [w for w in _WORD.findall(name) if w not in FILLER]
+        if not words:
+            return None, False
+        phrase = " ".join(words)
+        index = self.catalog.index
+        for candidate in [phrase] + words[::-1]:
+            food = index.exact(candidate)
+            if food is not None:
+                return food, False
+        food = index.guess(phrase)
+        return food, food is not None
+
+    def _grams(self, food: str, quantity, unit, size: float) -> float:
+        count = 1.0 if quantity is None else parse_quantity(quantity)
+        if unit is None:
+            if count > MAX_COUNT:
+                return count
+            return count * PIECE_GRAMS.get(food, DEFAULT_PORTION) * size
+        kind, amount = UNITS[UNIT_ALIASES[unit.rstrip(".")]]
+        if kind == "g":
+            return count * amount
+        if kind == "ml":
+            return count * amount * DENSITY.get(food, 1.0)
+        if kind == "serving":
+            return count * amount * PIECE_GRAMS.get(food, DEFAULT_PORTION)
+        return count * amount * PIECE_GRAMS.get(food, DEFAULT_PIECE) * size
+
+    def _parse_item(self, text: str, meal):
+        match = _ITEM.match(text)
+        quantity, unit, name = match.group("qty"), match.group("unit"), match.group("name")
+        # A trailing amount ("rice 200g", "chicken (150 g)") wins when it has a unit or there's no leading one
+        if match.group("qty2") and (quantity is None or match.group("unit2")):
+            quantity, unit = match.group("qty2"), match.group("unit2")
+        size = 1.0
+        found = _SIZE.search(name)
+        if found:
+            size = SIZES[found.group(1)]
+            name = _SIZE.sub("", name)
+        food, guess = self._food(name.strip(" .()-"))
+        unit = unit.rstrip(".") if unit else None
+        grams = round(self._grams(food, quantity, unit, size), 1) if food is not None else None
+        if grams is None or not (0 < grams <= MAX_GRAMS):
+            # Unknown food, or an amount of nothing ("0 g rice") or past MAX_GRAMS (including inf)
+            return ParsedItem(text, None, None, quantity, unit, meal, False)
+        return ParsedItem(text, food, grams, quantity, unit, meal, guess)
+
+    def _parse_line(self, line: str):
+        # (meal label or None, items) for one line
+        line = _LINE_PREFIX.sub("", line.strip().lower())
+        meal = None
+        label = _MEAL_LABEL.match(line)
+        if label:
+            meal = MEALS[label.group(1)]
+            line = line[label.end():]
+        parts = [p.strip(" .") for p in _SEPARATOR.split(line)]
+        return meal, tuple(self._parse_item(p, meal) for p in parts if p.strip(" .!?"))
+
+    def parse(self, text: str) -> list:
+        # ParsedItems for every item in text; a meal label ("Lunch:") applies to its line and the lines after it
+        items, meal = [], None
+        for line in text.splitlines():
+            label, parsed = self._line(line)
+            if label is not None:
+                meal = label
+            items += parsed if label is not None or meal is None else [p._replace(meal=meal) for p in parsed]
+        return items
+
+    def evaluate(self, text: str) -> MealEstimate:
+        # Parse and price every resolved item in one vectorized call
+        with metrics.span("meal.parse"):
+            parsed = self.parse(text)
+        resolved = [p for p in parsed if p.food is not None]
+        store = self.catalog.store
+        # Each distinct food is looked up once; a day's log repeats the same few dozen
+        foods = list(dict.fromkeys(p.food for p in resolved))
+        id_of = dict(zip(foods, store.ids_of(foods).tolist()))
+        values = store.estimate([id_of[p.food] for p in resolved], [p.grams for p in resolved])
+        values = {n: v for n, v in values.items() if n not in NON_ADDITIVE}
+        totals = {n: float(v.sum()) for n, v in values.items()}
+        return MealEstimate(resolved, values, totals, [p for p in parsed if p.food is None])
+
+    def cache_info(self) -> dict:
+        return {"lines": self._line.cache_info()._asdict(), "foods": self._food.cache_info()._asdict()}
+
+    def clear_cache(self):
+        self._line.cache_clear()
+        self._food.cache_clear()
@@ -0,0 +1,225 @@
+# metrics.py
+# Opt-in timing spans and counters for the hot paths, exported as Prometheus
+# text (server GET /metrics) and per-rerun reports (the app's debug panel).
+# Off by default: span() and count() then cost one global check. Turn on with
+# NUTRITION_METRICS=1 or enable(). A per-rerun capture (begin_rerun) records
+# its own thread's spans and counts without turning metrics on for anyone
+# else. Standard library only, no package imports, so any module can
+# instrument itself.
+#
+#   with metrics.span("plan"):
+#       ...
+#   metrics.count("figures_created")
+import os
+import threading
+import time
+from collections import namedtuple
+
+# Upper bounds (seconds) of the span histogram buckets
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+PROFILE_LINES = 40
+
+RerunReport = namedtuple("RerunReport", ["spans", "counters", "total_ms", "profile"])
+
+_enabled = os.environ.get("NUTRITION_METRICS", "") not in ("", "0")
+_lock = threading.Lock()
+_spans = {}         # name -> [count, sum seconds, max seconds, bucket counts...]
+_counters = {}      # name -> value
+_collectors = []    # () -> [(metric, type, help, labels, value)]
+_local = threading.local()
+_captures = 0       # threads with an active per-rerun capture
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def _capturing() -> bool:
+    return _captures > 0 and getattr(_local, "rerun", None) is not None
+
+
+def span(name: str):
+    # Context manager timing its body under `name` (a no-op object when disabled
+    # and this thread isn't capturing a rerun)
+    return _Span(name) if _enabled or _capturing() else _NO_SPAN
+
+
+def observe(name: str, seconds: float):
+    if _enabled:
+        with _lock:
+            entry = _spans.get(name)
+            if entry is None:
+                entry = _spans[name] = [0, 0.0, 0.0] + [0] * len(BUCKETS)
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    entry[3 + i] += 1
+                    break
+    if _capturing():
+        _local.rerun.append((name, seconds * 1e3))
+
+
+def count(name: str, n: int = 1):
+    if _captures and _capturing():
+        _local.counts[name] = _local.counts.get(name, 0) + n
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def register_collector(collect):
+    # collect() -> [(metric, type, help, labels dict, value)], called at export time only
+    _collectors.append(collect)
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+# -------------------------------
+# Per-rerun capture (one Streamlit script run, on the current thread)
+def begin_rerun(profile: str = None):
+    # Start collecting this thread's spans and counts; profile: None, "cprofile" or "pyinstrument"
+    global _captures
+    if getattr(_local, "rerun", None) is not None:
+        end_rerun()     # left by a rerun that was interrupted before it could end its capture
+    with _lock:
+        _captures += 1
+    _local.rerun = []
+    _local.counts = {}
+    _local.started = time.perf_counter()
+    _local.profiler = _start_profiler(profile) if profile else None
+
+
+def end_rerun() -> RerunReport:
+    # Stop this thread's capture (and profiler); an empty report when none is running
+    global _captures
+    spans = getattr(_local, "rerun", None)
+    if spans is not None:
+        with _lock:
+            _captures -= 1
+    counts = getattr(_local, "counts", None) or {}
+    total = (time.perf_counter() - getattr(_local, "started", time.perf_counter())) * 1e3
+    profiler = getattr(_local, "profiler", None)
+    _local.rerun = _local.counts = _local.profiler = None
+    return RerunReport(spans or [], counts, total, _stop_profiler(profiler) if profiler else None)
+
+
+def profilers() -> list:
+    available = ["cprofile"]
+    try:
+        import pyinstrument  # noqa: F401
+        available.append("pyinstrument")
+    except ImportError:
+        pass
+    return available
+
+
+def _start_profiler(kind: str):
+    if kind == "pyinstrument":
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        return kind, profiler
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return "cprofile", profiler
+
+
+def _stop_profiler(handle) -> str:
+    kind, profiler = handle
+    if kind == "pyinstrument":
+        profiler.stop()
+        return profiler.output_text(unicode=True)
+    import io
+    import pstats
+    profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+    return out.getvalue()
+
+
+# -------------------------------
+# Export
+def snapshot() -> dict:
+    # {"spans": {name: (count, total ms, max ms)}, "counters": {name: value}}
+    with _lock:
+        spans = {name: (e[0], e[1] * 1e3, e[2] * 1e3) for name, e in _spans.items()}
+        counters = dict(_counters)
+    return {"spans": spans, "counters": counters}
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in labels.items()) + "}"
+
+
+def prometheus_text(prefix: str = "nutrition") -> str:
+    lines = []
+    with _lock:
+        spans = {name: list(e) for name, e in _spans.items()}
+        counters = dict(_counters)
+    if spans:
+        metric = f"{prefix}_span_seconds"
+        lines += [f"# HELP {metric} Time spent in instrumented spans.", f"# TYPE {metric} histogram"]
+        for name, entry in sorted(spans.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS, entry[3:]):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{span="{name}",le="+Inf"}} {entry[0]}')
+            lines.append(f'{metric}_sum{{span="{name}"}} {entry[1]:.6f}')
+            lines.append(f'{metric}_count{{span="{name}"}} {entry[0]}')
+    if counters:
+        metric = f"{prefix}_events_total"
+        lines += [f"# HELP {metric} Instrumented event counts.", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{event="{name}"}} {value}' for name, value in sorted(counters.items())]
+    # Collected samples grouped per metric, as the text format requires
+    grouped = {}
+    for collect in _collectors:
+        for metric, kind, help_text, labels, value in collect():
+            grouped.setdefault(f"{prefix}_{metric}", (kind, help_text, []))[2].append((labels, value))
+    for metric, (kind, help_text, samples) in grouped.items():
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        lines += [f"{metric}{_labels(labels)} {value}" for labels, value in samples]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,207 @@
+# plans.py
+# Picks foods and portion sizes from the nutrition table so a day of meals
+# lands on the calorie and protein targets.
+#
+# Two vectorized passes, no external solver:
+#   1. per meal, every (food, portion) option of every slot is combined by
+#      broadcasting and the best few combinations near the meal's share of
+#      the targets are kept
+#   2. one combination per meal is chosen jointly against the daily targets,
+#      with a small penalty for repeating a food across meals
+# Portions are whole multiples of 10 g.
+from collections import namedtuple
+
+import numpy as np
+
+from .filters import CONDITION_RULES, condition_mask
+
+# foods: optional preferred foods; the slot falls back to its categories when
+# none of them are in the catalog (or all are filtered out)
+Slot = namedtuple("Slot", ["categories", "min_g", "max_g", "prefer", "foods"], defaults=((),))
+Meal = namedtuple("Meal", ["name", "share", "slots"])
+# items: {meal: [(food, grams, kcal, protein)]}, meals: {meal: (kcal, protein)}
+PlanSummary = namedtuple("PlanSummary", ["items", "meals", "calories", "protein"])
+
+DEFAULT_MEALS = (
+    Meal("Breakfast", 0.25, (Slot(("staple",), 30, 100, "spread", ("oats", "bread")),
+                             Slot(("dairy",), 100, 300, "spread", ("milk", "yogurt")),
+                             Slot(("fruit",), 80, 200, "spread"))),
+    Meal("Lunch", 0.35, (Slot(("staple",), 100, 250, "spread", ("rice", "pasta", "bread")),
+                         Slot(("protein",), 100, 250, "protein"),
+                         Slot(("vegetable",), 80, 200, "spread"))),
+    Meal("Snack", 0.10, (Slot(("dairy",), 80, 250, "protein", ("yogurt", "milk")),
+                         Slot(("fruit",), 80, 200, "spread"))),
+    Meal("Dinner", 0.30, (Slot(("protein",), 100, 250, "protein"),
+                          Slot(("vegetable",), 100, 250, "spread"),
+                          Slot(("vegetable",), 80, 200, "spread"))),
+)
+
+POOL_SIZE = 6        # foods considered per slot
+PORTION_STEPS = 8    # portion sizes considered per food
+MEAL_KEEP = 4        # combinations per meal and calorie level passed to the daily pass
+# Calorie levels (x the meal's share) kept per meal, so the daily pass can
+# make up for a meal that can't reach its share with a bigger one elsewhere
+MEAL_LEVELS = (0.85, 1.0, 1.15)
+PROTEIN_WEIGHT = 0.5   # per-meal protein error weight (meals don't need an exact split)
+REPEAT_PENALTY = 2e-4  # per food repeated across two meals (~1.4% calorie miss)
+
+
+class MealPlanner:
+    def __init__(self, store, meals=DEFAULT_MEALS):
+        self.store = store
+        self.meals = tuple(meals)
+        self.cal = store.columns["calories"].astype(np.float64) / 100.0
+        self.pro = store.columns["protein"].astype(np.float64) / 100.0
+
+        categories = store.text.get("category")
+        labels = list(categories) if categories is not None else [""] * len(store)
+        self._category_codes = {c: i for i, c in enumerate(dict.fromkeys(labels))}
+        codes = np.fromiter((self._category_codes[c] for c in labels), dtype=np.int32, count=len(labels))
+
+        # Per category, food ids pre-sorted by calorie density and by protein per kcal,
+        # so choosing a slot's pool at plan time is a filter, not a sort
+        protein_ratio = self.pro / np.maximum(self.cal, 1e-6)
+        self._by_density, self._by_protein = {}, {}
+        for category, code in self._category_codes.items():
+            ids = np.flatnonzero(codes == code)
+            self._by_density[category] = ids[np.argsort(self.cal[ids], kind="stable")]
+            self._by_protein[category] = ids[np.argsort(-protein_ratio[ids], kind="stable")]
+        self._condition_masks = {}
+
+    # -------------------------------
+    # Candidate filtering
+    def allowed_mask(self, exclude=(), conditions=()) -> np.ndarray:
+        allowed = np.ones(len(self.store), dtype=bool)
+        for name in exclude:
+            food_id = self.store.id_of(name)
+            if food_id >= 0:
+                allowed[food_id] = False
+        for condition in conditions:
+            allowed &= self._condition_mask(condition)
+        return allowed
+
+    def _condition_mask(self, condition: str) -> np.ndarray:
+        # Foods suitable for condition (filters.condition_mask); unknown conditions exclude nothing
+        mask = self._condition_masks.get(condition)
+        if mask is None:
+            mask = condition_mask(self.store, condition) if condition in CONDITION_RULES \
+                else np.ones(len(self.store), dtype=bool)
+            self._condition_masks[condition] = mask
+        return mask
+
+    def _slot_options(self, slot, allowed):
+        # All (food, grams) options for a slot as parallel arrays, or None if nothing fits
+        pool = self.store.ids_of(slot.foods)
+        pool = pool[pool >= 0]
+        pool = pool[allowed[pool]]
+        if not len(pool):
+            orders = self._by_protein if slot.prefer == "protein" else self._by_density
+            pool = [order[allowed[order]] for c in slot.categories if (order := orders.get(c)) is not None]
+            pool = np.concatenate(pool) if pool else np.empty(0, dtype=np.int64)
+        if not len(pool):
+            return None
+        if slot.prefer == "protein" and len(pool) > POOL_SIZE:
+            # Best protein per kcal first, then spread by calorie density like other slots
+            pool = pool[:POOL_SIZE * 3]
+            pool = pool[np.argsort(self.cal[pool], kind="stable")]
+        if len(pool) > POOL_SIZE:
+            # Evenly spaced across calorie density gives the search a usable range
+            pool = pool[np.linspace(0, len(pool) - 1, POOL_SIZE).round().astype(int)]
+        grams = np.unique(np.round(np.linspace(slot.min_g, slot.max_g, PORTION_STEPS) / 10) * 10)
+        ids = np.repeat(pool, len(grams))
+        grams = np.tile(grams, len(pool))
+        return ids, grams, self.cal[ids] * grams, self.pro[ids] * grams
+
+    # -------------------------------
+    # Pass 1: best combinations per meal
+    def _meal_candidates(self, meal, cal_target, pro_target, allowed):
+        options = [opt for slot in meal.slots if (opt := self._slot_options(slot, allowed)) is not None]
+        if not options:
+            return None
+        n = len(options)
+        cal = np.zeros((1,) * n, dtype=np.float32)
+        pro = np.zeros((1,) * n, dtype=np.float32)
+        for axis, (ids, _, c, p) in enumerate(options):
+            shape = [1] * n
+            shape[axis] = len(ids)
+            cal = cal + c.astype(np.float32).reshape(shape)
+            pro = pro + p.astype(np.float32).reshape(shape)
+
+        protein_cost = PROTEIN_WEIGHT * (np.minimum(pro - pro_target, 0) / pro_target) ** 2
+        # The same food twice in one meal is not a meal
+        for a in range(n):
+            for b in range(a + 1, n):
+                ids_a, ids_b = options[a][0], options[b][0]
+                if not np.intersect1d(ids_a, ids_b).size:
+                    continue
+                shape_a, shape_b = [1] * n, [1] * n
+                shape_a[a], shape_b[b] = len(ids_a), len(ids_b)
+                protein_cost = protein_cost + (ids_a.reshape(shape_a) == ids_b.reshape(shape_b)) * np.float32(1e6)
+
+        best = []
+        for level in MEAL_LEVELS:
+            target = np.float32(cal_target * level)
+            flat = (np.square((cal - target) / target) + protein_cost).ravel()
+            keep = min(MEAL_KEEP, flat.size)
+            best.append(np.argpartition(flat, keep - 1)[:keep])
+        best = np.unique(np.concatenate(best))
+        picks = np.unravel_index(best, cal.shape)
+        ids = np.stack([options[s][0][picks[s]] for s in range(n)], axis=1)
+        grams = np.stack([options[s][1][picks[s]] for s in range(n)], axis=1)
+        return ids, grams, cal.ravel()[best].astype(np.float64), pro.ravel()[best].astype(np.float64)
+
+    # -------------------------------
+    # Pass 2: one combination per meal, chosen against the daily targets
+    def plan(self, target_cals: float, protein_target: float, exclude=(), conditions=()) -> dict:
+        allowed = self.allowed_mask(exclude, conditions)
+        candidates = []
+        for meal in self.meals:
+            found = self._meal_candidates(meal, target_cals * meal.share, protein_target * meal.share, allowed)
+            if found is not None:
+                candidates.append((meal.name, found))
+        plan = {meal.name: [] for meal in self.meals}
+        if not candidates:
+            return plan
+
+        n = len(candidates)
+        day_cal = np.zeros((1,) * n)
+        day_pro = np.zeros((1,) * n)
+        penalty = np.zeros((1,) * n)
+        for axis, (_, (ids, _, c, p)) in enumerate(candidates):
+            shape = [1] * n
+            shape[axis] = len(ids)
+            day_cal = day_cal + c.reshape(shape)
+            day_pro = day_pro + p.reshape(shape)
+        for a in range(n):
+            for b in range(a + 1, n):
+                ids_a, ids_b = candidates[a][1][0], candidates[b][1][0]
+                repeats = (ids_a[:, None, :, None] == ids_b[None, :, None, :]).sum(axis=(2, 3))
+                shape = [1] * n
+                shape[a], shape[b] = len(ids_a), len(ids_b)
+                penalty = penalty + REPEAT_PENALTY * repeats.reshape(shape)
+
+        # Protein only has to be covered; going over it costs nothing
+        shortfall = np.minimum(day_pro - protein_target, 0) / protein_target
+        cost = ((day_cal - target_cals) / target_cals) ** 2 + shortfall ** 2 + penalty
+        choice = np.unravel_index(int(np.argmin(cost)), cost.shape)
+
+        for (name, (ids, grams, _, _)), pick in zip(candidates, choice):
+            plan[name] = [(self.store.names[int(i)], int(g)) for i, g in zip(ids[pick], grams[pick])]
+        return plan
+
+
+def summarize_plan(store, plan: dict) -> PlanSummary:
+    # Evaluate every planned item in one batch, then slice per meal
+    servings = [item for items in plan.values() for item in items]
+    ids = store.ids_of([fk for fk, _ in servings])
+    values = store.estimate(ids, [g for _, g in servings])
+    item_cals, item_pros = values["calories"], values["protein"]
+    items, meals = {}, {}
+    start = 0
+    for meal, meal_items in plan.items():
+        stop = start + len(meal_items)
+        items[meal] = [(fk, g, float(c), float(p)) for (fk, g), c, p
+                       in zip(meal_items, item_cals[start:stop], item_pros[start:stop])]
+        meals[meal] = (float(item_cals[start:stop].sum()), float(item_pros[start:stop].sum()))
+        start = stop
+    return PlanSummary(items, meals, float(item_cals.sum()), float(item_pros.sum()))
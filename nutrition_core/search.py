@@ -0,0 +1,239 @@
+# search.py
+# Search index over food names for the lookup box:
+#   - exact match after normalizing case, hyphens, synonyms and plural forms
+#   - prefix completion over every word start ("cre" -> "ice cream")
+#   - typo tolerance: trigram postings pick candidates, edit distance ranks them
+from bisect import bisect_left
+from collections import namedtuple
+
+import numpy as np
+
+# Alternative names -> catalog name
+SYNONYMS = {
+    "icecream": "ice cream",
+    "hot dog": "hotdog",
+    "chips": "fries",
+    "french fries": "fries",
+    "curd": "yogurt",
+    "yoghurt": "yogurt",
+    "dahi": "yogurt",
+    "lamb": "mutton",
+    "goat": "mutton",
+    "maize": "corn",
+    "chicken breast": "chicken",
+    "dal": "lentils",
+    "daal": "lentils",
+    "oatmeal": "oats",
+    "porridge": "oats",
+    "spaghetti": "pasta",
+    "noodles": "pasta",
+    "aloo": "potato",
+    "kela": "banana",
+    "seb": "apple",
+    "chawal": "rice",
+    "roti": "bread",
+    "chapati": "bread",
+    "toast": "bread",
+    "steak": "beef",
+    "salmon": "fish",
+    "tuna": "fish",
+    "chickpeas": "beans",
+}
+
+Match = namedtuple("Match", ["name", "food_id", "distance", "kind"])
+
+_PREFIX_SCAN = 64      # prefix-range entries looked at before ranking
+_FUZZY_CANDIDATES = 32  # trigram-vote winners scored by edit distance
+MIN_GUESS_LENGTH = 5    # shorter queries must match exactly; one typo in "beer" is already "beef"
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().replace("-", " ").replace("_", " ").split())
+
+
+def word_forms(word: str):
+    # The word itself plus likely singular / plural spellings
+    forms = [word]
+    if word.endswith("ies") and len(word) > 4:
+        forms.append(word[:-3] + "y")
+    elif word.endswith("oes"):
+        forms.append(word[:-2])
+    elif word.endswith(("ches", "shes", "xes", "ses", "zes")):
+        forms.append(word[:-2])
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        forms.append(word[:-1])
+    if not word.endswith("s"):
+        forms.append(word[:-1] + "ies" if word.endswith("y") and len(word) > 2 else word + "s")
+        forms.append(word + "es")
+    return forms
+
+
+def _trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(pattern_bits: dict, m: int, text: str, limit: int = None) -> int:
+    # Bit-parallel Levenshtein distance (Myers / Hyyrö) against a pattern of
+    # length m encoded by pattern_bits(). With a limit, returns limit + 1 as
+    # soon as the distance is known to exceed it.
+    if m == 0:
+        dist = len(text)
+        return dist if limit is None or dist <= limit else limit + 1
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    vp, vn, dist = full, 0, m
+    remaining = len(text)
+    for c in text:
+        remaining -= 1
+        eq = pattern_bits.get(c, 0)
+        d0 = ((((eq & vp) + vp) ^ vp) | eq | vn) & full
+        hp = (vn | ~(d0 | vp)) & full
+        hn = vp & d0
+        if hp & last:
+            dist += 1
+        elif hn & last:
+            dist -= 1
+        hp = ((hp << 1) | 1) & full
+        hn = (hn << 1) & full
+        vp = (hn | ~(d0 | hp)) & full
+        vn = hp & d0
+        if limit is not None and dist - remaining > limit:
+            return limit + 1
+    return dist if limit is None or dist <= limit else limit + 1
+
+
+def pattern_bits(pattern: str) -> dict:
+    bits = {}
+    for i, c in enumerate(pattern):
+        bits[c] = bits.get(c, 0) | (1 << i)
+    return bits
+
+
+def max_typos(query: str) -> int:
+    return 0 if len(query) < 4 else 1 if len(query) < 7 else 2
+
+
+class FoodSearchIndex:
+    def __init__(self, names, synonyms=SYNONYMS):
+        # names: catalog names as stored, returned by every lookup; matching uses their normalized keys
+        self.names = list(names)
+        self._keys = [normalize(n) for n in self.names]
+        self._ids = {key: i for i, key in enumerate(self._keys)}
+        self._lengths = np.array([len(k) for k in self._keys], dtype=np.int32)
+        self.synonyms = {normalize(k): normalize(v) for k, v in synonyms.items()}
+
+        # Prefix keys: the full name and every later word start, sorted
+        keys = []
+        for i, name in enumerate(self._keys):
+            keys.append((name, i))
+            pos = name.find(" ")
+            while pos >= 0:
+                keys.append((name[pos + 1:], i))
+                pos = name.find(" ", pos + 1)
+        keys.sort()
+        self._prefix_keys = [k for k, _ in keys]
+        self._prefix_ids = np.array([i for _, i in keys], dtype=np.int32)
+
+        # Trigram -> sorted array of food ids
+        postings = {}
+        for i, name in enumerate(self._keys):
+            for gram in _trigrams(name):
+                postings.setdefault(gram, []).append(i)
+        self._postings = {g: np.array(ids, dtype=np.int32) for g, ids in postings.items()}
+
+    @classmethod
+    def from_store(cls, store, synonyms=SYNONYMS):
+        return cls(store.names, synonyms)
+
+    def __len__(self):
+        return len(self.names)
+
+    # -------------------------------
+    # Lookups
+    def exact(self, query: str):
+        # Catalog name for the query after synonym / plural normalization, else None
+        query = normalize(query)
+        if not query:
+            return None
+        head, _, last = query.rpartition(" ")
+        head = head + " " if head else ""
+        for form in word_forms(last):
+            candidate = head + form
+            candidate = self.synonyms.get(candidate, candidate)
+            if candidate in self._ids:
+                return self.names[self._ids[candidate]]
+        return None
+
+    def complete(self, prefix: str, k: int = 8):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        lo = bisect_left(self._prefix_keys, prefix)
+        hi = bisect_left(self._prefix_keys, prefix + "\uffff", lo)
+        seen = dict.fromkeys(self._prefix_ids[lo:min(hi, lo + _PREFIX_SCAN)].tolist())
+        ranked = sorted(seen, key=lambda i: (len(self._keys[i]), self._keys[i]))
+        return [Match(self.names[i], i, 0, "prefix") for i in ranked[:k]]
+
+    def fuzzy(self, query: str, k: int = 5, max_distance: int = None):
+        query = normalize(query)
+        if not query:
+            return []
+        if max_distance is None:
+            max_distance = max_typos(query)
+        lists = sorted((self._postings[g] for g in _trigrams(query) if g in self._postings), key=len)
+        if not lists:
+            return []
+        # Each edit destroys at most 3 trigrams, so any name within max_distance
+        # shares one of the 3 * max_distance + 1 rarest query trigrams
+        ids, votes = np.unique(np.concatenate(lists[:3 * max_distance + 1]), return_counts=True)
+        m = len(query)
+        close = np.abs(self._lengths[ids] - m) <= max_distance
+        ids, votes = ids[close], votes[close]
+        if len(ids) > _FUZZY_CANDIDATES:
+            top = np.argpartition(-votes, _FUZZY_CANDIDATES)[:_FUZZY_CANDIDATES]
+            ids, votes = ids[top], votes[top]
+
+        bits = pattern_bits(query)
+        scored = []
+        for i, v in zip(ids.tolist(), votes.tolist()):
+            key = self._keys[i]
+            d = edit_distance(bits, m, key, max_distance)
+            if d <= max_distance:
+                scored.append((d, -v, key, i))
+        scored.sort()
+        return [Match(self.names[i], i, d, "fuzzy") for d, _, _, i in scored[:k]]
+
+    def search(self, query: str, k: int = 5):
+        # Best matches first: exact/synonym/plural, then prefix completions, then typos
+        results, seen = [], set()
+
+        def add(matches):
+            for match in matches:
+                if match.food_id not in seen:
+                    seen.add(match.food_id)
+                    results.append(match)
+
+        name = self.exact(query)
+        if name is not None:
+            add([Match(name, self._ids[normalize(name)], 0, "exact")])
+        add(self.complete(query, k))
+        if len(results) < k:
+            add(self.fuzzy(query, k))
+        return results[:k]
+
+    def guess(self, query: str):
+        # The one catalog name closest to a misspelt query, or None when the query is
+        # short or two names are equally close
+        query = normalize(query)
+        if len(query) < MIN_GUESS_LENGTH:
+            return None
+        matches = self.fuzzy(query, k=2)
+        if len(matches) == 1 or len(matches) == 2 and matches[0].distance < matches[1].distance:
+            return matches[0].name
+        return None
+
+    def resolve(self, query: str):
+        # Single catalog name the query most likely means, or None
+        name = self.exact(query)
+        return name if name is not None else self.guess(query)
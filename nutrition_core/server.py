@@ -0,0 +1,517 @@
+# server.py
+# JSON HTTP API over the same engine as the Streamlit app, for the mobile
+# client and anything else that can't drive a Streamlit session. One asyncio
+# process keeps the food table, search index and planner resident; run
+# several behind a load balancer to scale out. Standard library only.
+#
+#   python -m nutrition_core.server --port 8080
+#
+#   POST /lookup   {"food": "chiken", "grams": 150}
+#   POST /targets  {"dob": "2003-01-01" or "age": 23, "gender", "weight", "height", "goal", "activity"}
+#   POST /plan     {"target_cals", "protein_target"} or the /targets fields; optional "exclude", "conditions"
+#   POST /advice   {"conditions": ["diabetes", "high_bp"], optional "goal", "days_left"}
+#   POST /projection  the /targets fields plus "days" or "target_date"; optional "goal_weight", "activities",
+#                     "adjustments" (kcal/day; scenarios are every activity x adjustment), "step" (days per point);
+#                     a curve stops (null weights, "floor_date") below BMI 15
+#   POST /foods    {"conditions": [...], optional "max_calories", "categories", "limit"}  (per-100 g profiles)
+#   POST /batch    {"requests": [{"endpoint": "lookup", "food": "rice", "grams": 200}, ...]}
+#   POST /diary/log  {"user", "food", "grams"} or {"user", "items": [{"food", "grams"}, ...]}; optional "day", "meal"
+#   POST /meal     {"text": "2 eggs, 200g rice and a cup of milk"}; optional "user" (and "day") logs the items,
+#                  except typo guesses ("guess": true), which come back under "skipped"
+#   GET  /diary    ?user=...&start=YYYY-MM-DD&end=YYYY-MM-DD  (daily and rolling 7/30-day totals)
+#   GET  /health
+#   GET  /metrics  Prometheus text format (spans need NUTRITION_METRICS=1)
+#
+# GET works too, with the fields as query parameters (lists comma-separated).
+# API diaries are keyed by the unauthenticated "user" string in their own namespace
+# ("api:<user>"), so they never reach the app's signed-in or per-session diaries.
+# Errors come back as {"error": message} with a 4xx status.
+import argparse
+import asyncio
+import json
+import math
+import sys
+from datetime import date, timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+from . import metrics
+from .advice import advice_for, combined_advice, condition_names, plan_feedback, timeline_note, workouts_for
+from .diary import FLUSH_INTERVAL, default_diary
+from .lookup import default_catalog
+from .meal_parser import MAX_GRAMS
+from .targets import activity_aliases, calculate_age, daily_targets, goal_aliases
+from .trajectory import MAX_DAYS, floor_weight, goal_dates, project_weight, scenario_grid
+
+MAX_BODY = 1 << 20
+MAX_BATCH = 1000
+MAX_FOODS = 200      # rows per /foods response
+MAX_SCENARIOS = 100  # activities x adjustments per /projection request
+MAX_MEAL_TEXT = 64 << 10
+# Largest accepted value per numeric field (absolute value for signed fields)
+MAXIMUMS = {"grams": MAX_GRAMS, "age": 130, "weight": 500, "height": 300, "goal_weight": 500,
+            "target_cals": 20_000, "protein_target": 1_000, "max_calories": 10_000, "adjustment": 5_000,
+            "days": MAX_DAYS, "step": MAX_DAYS, "limit": 10_000, "days_left": 36_500}
+_genders = {"male": "Male", "m": "Male", "female": "Female", "f": "Female"}
+_reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# -------------------------------
+# Field parsing
+def _field(body: dict, key: str):
+    value = body.get(key)
+    if value is None or value == "":
+        raise ApiError(400, f"missing field: {key}")
+    return value
+
+
+def _number(body: dict, key: str, positive: bool = True) -> float:
+    value = _field(body, key)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"{key} must be a number") from None
+    if not math.isfinite(value):
+        raise ApiError(400, f"{key} must be a finite number")
+    if positive and value <= 0:
+        raise ApiError(400, f"{key} must be a positive number")
+    maximum = MAXIMUMS.get(key)
+    if maximum is not None and abs(value) > maximum:
+        raise ApiError(400, f"{key} must be at most {maximum:g}")
+    return value
+
+
+def _choice(body: dict, key: str, aliases: dict) -> str:
+    value = _field(body, key)
+    label = aliases.get(str(value).strip().lower())
+    if label is None:
+        raise ApiError(400, f"unknown {key}: {value}")
+    return label
+
+
+def _list(body: dict, key: str) -> list:
+    value = body.get(key) or []
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        raise ApiError(400, f"{key} must be a list")
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+def _age(body: dict) -> int:
+    if body.get("age") not in (None, ""):
+        return int(_number(body, "age"))
+    try:
+        dob = date.fromisoformat(str(_field(body, "dob")))
+    except ValueError:
+        raise ApiError(400, "dob must be YYYY-MM-DD") from None
+    age = calculate_age(dob)
+    if age < 0:
+        raise ApiError(400, "dob is in the future")
+    return age
+
+
+def _conditions(body: dict) -> list:
+    selected = _list(body, "conditions")
+    unknown = [c for c in selected if c not in condition_names]
+    if unknown:
+        raise ApiError(400, f"unknown conditions: {', '.join(unknown)} (known: {', '.join(condition_names)})")
+    return selected
+
+
+# -------------------------------
+# Endpoints: dict in, dict out
+def lookup(body: dict) -> dict:
+    result = _lookup_many([body])[0]
+    if isinstance(result, ApiError):
+        raise result
+    return result
+
+
+def _lookup_many(bodies: list) -> list:
+    # Resolve each query, then price every serving in one vectorized call;
+    # failed items come back as ApiError instances
+    catalog = default_catalog()
+    results, servings, slots = [], [], []
+    for body in bodies:
+        try:
+            query, grams = str(_field(body, "food")), _number(body, "grams")
+            name = catalog.resolve(query)
+            if name is None:
+                raise ApiError(404, f"no food matching {query!r}")
+        except ApiError as e:
+            results.append(e)
+            continue
+        slots.append(len(results))
+        results.append((name, query.strip(), grams))
+        servings.append((name, grams))
+    if servings:
+        calories, protein = catalog.estimate_servings(servings)
+        for i, cal, pro in zip(slots, calories.tolist(), protein.tolist()):
+            name, query, grams = results[i]
+            results[i] = {"name": name, "query": query, "grams": grams, "calories": round(cal, 1),
+                          "protein": round(pro, 1), "tip": catalog.small_health_tip(name)}
+    return results
+
+
+def targets(body: dict) -> dict:
+    age = _age(body)
+    gender = _choice(body, "gender", _genders)
+    goal = _choice(body, "goal", goal_aliases)
+    activity = _choice(body, "activity", activity_aliases)
+    weight = _number(body, "weight")
+    t = daily_targets(gender, weight, _number(body, "height"), age, goal, activity)
+    return {"age": age, "gender": gender, "goal": goal, "activity": activity,
+            "bmr": round(t.bmr, 1), "maintenance": round(t.maintenance, 1),
+            "target_cals": round(t.target_cals, 1), "protein_target": round(t.protein_target, 1)}
+
+
+def plan(body: dict) -> dict:
+    catalog = default_catalog()
+    exclude, selected = _list(body, "exclude"), _conditions(body)
+    if body.get("target_cals") not in (None, ""):
+        target_cals, protein_target = _number(body, "target_cals"), _number(body, "protein_target")
+        _, summary = catalog.plan_summary(target_cals, protein_target, exclude, selected)
+    else:
+        t = targets(body)
+        result = catalog.personal_plan(t["gender"], _number(body, "weight"), _number(body, "height"), t["age"],
+                                       t["goal"], t["activity"], exclude, selected)
+        target_cals, protein_target = result.targets.target_cals, result.targets.protein_target
+        summary = result.summary
+    meals = [{"name": meal,
+              "items": [{"food": fk, "grams": g, "calories": round(cal, 1), "protein": round(pro, 1)}
+                        for fk, g, cal, pro in items],
+              "calories": round(summary.meals[meal][0], 1), "protein": round(summary.meals[meal][1], 1)}
+             for meal, items in summary.items.items()]
+    feedback = plan_feedback(summary.calories, summary.protein, target_cals, protein_target)
+    return {"target_cals": round(target_cals, 1), "protein_target": round(protein_target, 1), "meals": meals,
+            "calories": round(summary.calories, 1), "protein": round(summary.protein, 1),
+            "feedback": [{"level": level, "message": message} for level, message in feedback]}
+
+
+def projection(body: dict) -> dict:
+    # Weight curves for every activity x adjustment scenario, sampled every `step` days
+    t = targets(body)
+    weight, height = _number(body, "weight"), _number(body, "height")
+    if body.get("target_date") not in (None, ""):
+        days = (_diary_day(body, "target_date") - date.today()).days
+    else:
+        days = int(_number(body, "days"))
+    if not 1 <= days <= MAX_DAYS:
+        raise ApiError(400, f"days must be between 1 and {MAX_DAYS}")
+    activities = [_choice({"activity": a}, "activity", activity_aliases) for a in _list(body, "activities")] \
+        or [t["activity"]]
+    adjustments = [_number({"adjustment": a}, "adjustment", positive=False) for a in _list(body, "adjustments")] \
+        or [round(t["target_cals"] - t["maintenance"])]
+    if len(activities) * len(adjustments) > MAX_SCENARIOS:
+        raise ApiError(413, f"at most {MAX_SCENARIOS} scenarios (activities x adjustments) per projection")
+    goal_weight = _number(body, "goal_weight") if body.get("goal_weight") not in (None, "") else None
+    step = max(1, int(_number(body, "step"))) if body.get("step") not in (None, "") else 7
+    result = project_weight(t["gender"], weight, height, t["age"], *scenario_grid(activities, adjustments), days,
+                            goal_weight)
+    # Curves end (null) on floor_date, when the weight would drop below floor_weight
+    sampled = [[None if math.isnan(w) else w for w in curve]
+               for curve in result.weights[:, list(range(0, days, step)) + [days]].round(2).tolist()]
+    today = date.today()
+    reached = goal_dates(result, today)
+    return {"days": days, "step": step, "floor_weight": round(floor_weight(height), 1), "scenarios": [
+        {"activity": s.activity, "adjustment": s.adjustment, "intake": round(float(intake), 1),
+         "weights": curve, "final_weight": curve[-1], "goal_date": d.isoformat() if d else None,
+         "floor_date": (today + timedelta(days=floor)).isoformat() if floor >= 0 else None}
+        for s, intake, curve, d, floor in zip(result.scenarios, result.intake.tolist(), sampled, reached,
+                                              result.floor_day.tolist())]}
+
+
+def advice(body: dict) -> dict:
+    selected = _conditions(body)
+    out = {"conditions": [{"title": a["title"], "goal": a["goal"],
+                           "sections": [{"heading": h, "lines": lines} for h, lines in a["sections"]]}
+                          for a in advice_for(selected)],
+           "combined": combined_advice if selected else []}
+    if body.get("goal"):
+        goal = _choice(body, "goal", goal_aliases)
+        out["workouts"] = workouts_for(goal)
+        if body.get("days_left") not in (None, ""):
+            out["timeline"] = timeline_note(goal, int(_number(body, "days_left")))
+    return out
+
+
+def foods(body: dict) -> dict:
+    # Foods suitable for every listed condition, lowest calories first
+    catalog = default_catalog()
+    max_calories = _number(body, "max_calories") if body.get("max_calories") not in (None, "") else None
+    limit = int(_number(body, "limit")) if body.get("limit") not in (None, "") else MAX_FOODS
+    ids = catalog.filter.query(_conditions(body), max_calories, _list(body, "categories"), limit=min(limit, MAX_FOODS))
+    store = catalog.store
+    rows = store.table[:, ids].T.tolist()
+    return {"foods": [dict(name=store.names[i], category=store.text_of("category", i),
+                           **{n: round(v, 1) for n, v in zip(store.nutrients, row)})
+                      for i, row in zip(ids.tolist(), rows)]}
+
+
+def batch(body: dict) -> dict:
+    # Many requests in one round trip; lookups are priced together
+    requests = body.get("requests")
+    if not isinstance(requests, list):
+        raise ApiError(400, "requests must be a list")
+    if len(requests) > MAX_BATCH:
+        raise ApiError(413, f"at most {MAX_BATCH} requests per batch")
+    results = [None] * len(requests)
+    lookups = []
+    for i, item in enumerate(requests):
+        endpoint = item.get("endpoint") if isinstance(item, dict) else None
+        if endpoint == "lookup":
+            lookups.append(i)
+        elif endpoint in ENDPOINTS and endpoint != "batch":
+            results[i] = _call(ENDPOINTS[endpoint], item)
+        else:
+            results[i] = {"status": 400, "error": f"unknown endpoint: {endpoint}"}
+    for i, result in zip(lookups, _lookup_many([requests[i] for i in lookups])):
+        results[i] = {"status": result.status, "error": str(result)} if isinstance(result, ApiError) else result
+    return {"results": results}
+
+
+def _call(handler, body: dict) -> dict:
+    try:
+        return handler(body)
+    except ApiError as e:
+        return {"status": e.status, "error": str(e)}
+
+
+def _diary_day(body: dict, key: str):
+    value = body.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise ApiError(400, f"{key} must be YYYY-MM-DD") from None
+
+
+def _diary_owner(user: str) -> str:
+    # Owner key in the shared diary database; see the module header
+    return "api:" + user
+
+
+def _meal_name(body: dict):
+    value = body.get("meal")
+    if value in (None, ""):
+        return None
+    if not isinstance(value, str):
+        raise ApiError(400, "meal must be a string")
+    return value
+
+
+def diary_log(body: dict) -> dict:
+    user = str(_field(body, "user"))
+    items = body.get("items")
+    if items is None:
+        items = [body]
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        raise ApiError(400, "items must be a list of objects")
+    pairs = [(str(_field(item, "food")), _number(item, "grams")) for item in items]
+    unknown = [food for food, _ in pairs if default_catalog().resolve(food) is None]
+    if unknown:
+        raise ApiError(404, f"no food matching {', '.join(map(repr, unknown))}")
+    # Queued; the diary writes in batches (and on every read)
+    day, meal = _diary_day(body, "day"), _meal_name(body)
+    diary = default_diary()
+    return {"user": user, "logged": [diary.log(_diary_owner(user), food, grams, day, meal) for food, grams in pairs]}
+
+
+def meal(body: dict) -> dict:
+    # Free-text meal (or a day's log, one line each) -> items, totals, and what didn't match
+    text = _field(body, "text")
+    if not isinstance(text, str):
+        raise ApiError(400, "text must be a string")
+    if len(text) > MAX_MEAL_TEXT:
+        raise ApiError(413, f"text is limited to {MAX_MEAL_TEXT} characters")
+    estimate = default_catalog().parse_meal(text)
+    per_item = {n: v.round(1).tolist() for n, v in estimate.values.items()}
+    out = {"items": [dict(text=p.text, food=p.food, grams=p.grams, meal=p.meal, guess=p.guess,
+                          **{n: values[i] for n, values in per_item.items()})
+                     for i, p in enumerate(estimate.items)],
+           "totals": {n: round(v, 1) for n, v in estimate.totals.items()},
+           "unknown": [p.text for p in estimate.unknown]}
+    if body.get("user") not in (None, ""):
+        user, day, by_meal = str(body["user"]), _diary_day(body, "day"), {}
+        sure = [p for p in estimate.items if not p.guess]
+        for p in sure:
+            by_meal.setdefault(p.meal, []).append((p.food, p.grams))
+        try:
+            for meal_name, items in by_meal.items():
+                default_diary().log_many(_diary_owner(user), items, day, meal_name)
+        except ValueError as e:
+            raise ApiError(400, str(e)) from None
+        out["logged"] = len(sure)
+        out["skipped"] = [p.text for p in estimate.items if p.guess]
+    return out
+
+
+def diary(body: dict) -> dict:
+    user = str(_field(body, "user"))
+    history = default_diary().history(_diary_owner(user), _diary_day(body, "start"), _diary_day(body, "end"))
+    return {"user": user, "days": [{k: round(v, 1) if isinstance(v, float) else v for k, v in t._asdict().items()}
+                                   for t in history]}
+
+
+def health(body: dict) -> dict:
+    catalog = default_catalog()
+    return {"status": "ok", "foods": len(catalog.store), "result_cache": catalog.results.stats()._asdict()}
+
+
+def metrics_text(body: dict) -> str:
+    return metrics.prometheus_text()
+
+
+ENDPOINTS = {"lookup": lookup, "targets": targets, "projection": projection, "plan": plan, "advice": advice, "foods": foods, "batch": batch,
+             "diary/log": diary_log, "meal": meal, "diary": diary, "health": health, "metrics": metrics_text}
+
+
+_SLOW = {"plan", "projection"}
+
+
+def _slow(name: str, payload: dict) -> bool:
+    # Plans and projections take milliseconds; run them off the event loop so lookups keep flowing
+    if name == "batch":
+        requests = payload.get("requests")
+        return isinstance(requests, list) and any(isinstance(r, dict) and r.get("endpoint") in _SLOW
+                                                  for r in requests)
+    return name in _SLOW
+
+
+# -------------------------------
+# HTTP/1.1 over asyncio streams (keep-alive, Content-Length bodies)
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise ApiError(400, "malformed request line") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise ApiError(400, "bad Content-Length") from None
+    if length > MAX_BODY:
+        raise ApiError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+async def _dispatch(method: str, target: str, body: bytes):
+    url = urlsplit(target)
+    name = url.path.strip("/")
+    handler = ENDPOINTS.get(name)
+    if handler is None:
+        raise ApiError(404, f"no endpoint {url.path}")
+    if method == "GET":
+        payload = dict(parse_qsl(url.query))
+    elif method == "POST":
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            raise ApiError(400, "body is not valid JSON") from None
+        if not isinstance(payload, dict):
+            raise ApiError(400, "body must be a JSON object")
+    else:
+        raise ApiError(405, f"{method} not allowed")
+    with metrics.span("http." + name):
+        if _slow(name, payload):
+            return await asyncio.get_running_loop().run_in_executor(None, handler, payload)
+        return handler(payload)
+
+
+def _response(status: int, payload, keep_alive: bool) -> bytes:
+    # dicts go out as JSON, strings (/metrics) as plain text
+    if isinstance(payload, str):
+        data, content_type = payload.encode(), "text/plain; version=0.0.4"
+    else:
+        data, content_type = json.dumps(payload, ensure_ascii=False).encode(), "application/json"
+    head = (f"HTTP/1.1 {status} {_reasons.get(status, '')}\r\n"
+            f"Content-Type: {content_type}; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + data
+
+
+async def _serve_connection(reader, writer):
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload = 200, await _dispatch(method, target, body)
+            except ApiError as e:
+                status, payload = e.status, {"error": str(e)}
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception as e:  # keep serving other requests
+                print(f"error handling request: {e!r}", file=sys.stderr)
+                status, payload = 500, {"error": "internal error"}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def _flush_diary(diary):
+    # Queued diary entries reach disk within FLUSH_INTERVAL even when traffic stops
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        try:
+            diary.flush()
+        except Exception as e:  # entries stay queued; keep flushing
+            print(f"error flushing diary: {e!r}", file=sys.stderr)
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8080):
+    # Load the table and build the index and planner before accepting requests
+    catalog = default_catalog()
+    catalog.index, catalog.planner
+    flusher = asyncio.create_task(_flush_diary(default_diary()))
+    server = await asyncio.start_server(_serve_connection, host, port)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"serving {len(catalog.store)} foods on http://{host}:{port}", file=sys.stderr, flush=True)
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            flusher.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON HTTP API for food lookup, targets, plans and advice.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="0 picks a free port")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# store.py
+# Columnar nutrition table: one float32 array per nutrient (values per 100g),
+# food names mapped to integer row ids, and batch estimation over whole
+# serving lists (ids + grams in, nutrient totals out).
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class NutritionStore:
+    def __init__(self, names, nutrients, table, text=None, find=None):
+        # names: sequence of food names, row i of every column
+        # table: shape (len(nutrients), len(names)), values per 100g
+        # text: optional {column: sequence of str} (e.g. "tip", "category")
+        # find: optional name -> id function; defaults to a dict index
+        self.names = names
+        self.nutrients = tuple(nutrients)
+        self.table = table if isinstance(table, np.ndarray) and table.dtype == np.float32 \
+            else np.ascontiguousarray(table, dtype=np.float32)
+        if self.table.shape != (len(self.nutrients), len(self.names)):
+            raise ValueError(f"table shape {self.table.shape} does not match "
+                             f"{len(self.nutrients)} nutrients x {len(self.names)} foods")
+        # Each nutrient column is a view into the shared table
+        self.columns = {n: self.table[i] for i, n in enumerate(self.nutrients)}
+        self.text = dict(text or {})
+        self._find = find
+        if find is None:
+            ids = {name: i for i, name in enumerate(names)}
+            self._find = lambda name: ids.get(name, -1)
+
+    @classmethod
+    def from_dict(cls, table: dict, tips: dict = None):
+        names = list(table)
+        nutrients = list(next(iter(table.values()))) if table else []
+        values = np.array([[table[name].get(n, 0.0) for name in names] for n in nutrients],
+                          dtype=np.float32).reshape(len(nutrients), len(names))
+        text = {"tip": [(tips or {}).get(name, "") for name in names]}
+        return cls(names, nutrients, values, text=text)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return self._find(name) >= 0
+
+    # -------------------------------
+    # Name <-> id
+    def id_of(self, name: str) -> int:
+        return self._find(name)
+
+    def ids_of(self, names) -> np.ndarray:
+        find = self._find
+        return np.fromiter((find(n) for n in names), dtype=np.int64, count=len(names))
+
+    def row(self, food_id: int) -> dict:
+        return {n: float(self.table[i, food_id]) for i, n in enumerate(self.nutrients)}
+
+    def text_of(self, column: str, food_id: int) -> str:
+        values = self.text.get(column)
+        if values is None or food_id < 0:
+            return ""
+        return values[food_id]
+
+    def tip_of(self, food_id: int) -> str:
+        return self.text_of("tip", food_id)
+
+    # -------------------------------
+    # Batch estimation
+    def _prepare(self, ids, grams):
+        ids = np.asarray(ids, dtype=np.int64)
+        grams = np.asarray(grams, dtype=np.float64)
+        if ids.shape != grams.shape:
+            raise ValueError("ids and grams must have the same shape")
+        # Unknown foods (id -1) contribute nothing
+        known = ids >= 0
+        return np.where(known, ids, 0), np.where(known, grams, 0.0) / 100.0
+
+    def estimate_matrix(self, ids, grams) -> np.ndarray:
+        # Per-item values, shape (n_nutrients, n_items)
+        ids, scale = self._prepare(ids, grams)
+        return self.table[:, ids] * scale
+
+    def estimate(self, ids, grams) -> dict:
+        # Per-item values keyed by nutrient
+        return dict(zip(self.nutrients, self.estimate_matrix(ids, grams)))
+
+    def totals(self, ids, grams) -> dict:
+        ids, scale = self._prepare(ids, grams)
+        sums = self.table[:, ids] @ scale
+        return {n: float(v) for n, v in zip(self.nutrients, sums)}
+
+    def group_totals(self, ids, grams, groups, n_groups: int) -> dict:
+        # Totals per group (e.g. per meal), each value an array of length n_groups
+        values = self.estimate_matrix(ids, grams)
+        groups = np.asarray(groups, dtype=np.int64)
+        return {n: np.bincount(groups, weights=values[i], minlength=n_groups)
+                for i, n in enumerate(self.nutrients)}
+
+
+# -------------------------------
+# Dict-style views, so code written against the old literals keeps working
+class NutritionView(Mapping):
+    # name -> {nutrient: value per 100g}
+    def __init__(self, store: NutritionStore):
+        self._store = store
+
+    def __getitem__(self, name):
+        food_id = self._store.id_of(name)
+        if food_id < 0:
+            raise KeyError(name)
+        return self._store.row(food_id)
+
+    def __contains__(self, name):
+        return name in self._store
+
+    def __iter__(self):
+        return iter(self._store.names)
+
+    def __len__(self):
+        return len(self._store)
+
+
+class TipsView(Mapping):
+    # name -> health tip, only for foods that have one
+    def __init__(self, store: NutritionStore):
+        self._store = store
+
+    def __getitem__(self, name):
+        tip = self._store.tip_of(self._store.id_of(name))
+        if not tip:
+            raise KeyError(name)
+        return tip
+
+    def __iter__(self):
+        tips = self._store.text.get("tip", ())
+        return (name for name, tip in zip(self._store.names, tips) if tip)
+
+    def __len__(self):
+        return sum(1 for _ in self)
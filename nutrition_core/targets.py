@@ -0,0 +1,64 @@
+# targets.py
+# Daily energy and protein targets (Mifflin-St Jeor BMR x activity factor,
+# adjusted for the goal). Pure Python, safe to import anywhere.
+from collections import namedtuple
+
+# Activity factors
+activity_factors = {
+    "Sedentary (little/no exercise)": 1.2,
+    "Light (1-3 days/week)": 1.375,
+    "Moderate (3-5 days/week)": 1.55,
+    "Active (6-7 days/week)": 1.725,
+    "Very Active (hard training/physical job)": 1.9
+}
+
+MAINTAIN = "Maintain Weight"
+LOSE = "Lose Weight (fat loss)"
+GAIN = "Gain Muscle (lean mass)"
+goals = [MAINTAIN, LOSE, GAIN]
+
+# kcal/day added to maintenance, and protein g per kg body weight, by goal
+goal_calorie_adjustment = {MAINTAIN: 0, LOSE: -500, GAIN: 300}
+goal_protein_per_kg = {MAINTAIN: 1.2, LOSE: 1.5, GAIN: 1.8}
+
+
+def _aliases(labels) -> dict:
+    # Full label plus its short forms: "Lose Weight (fat loss)" -> "lose weight (fat loss)", "lose weight", "lose"
+    aliases = {}
+    for label in labels:
+        short = label.split(" (")[0].lower()
+        for key in (label.lower(), short, short.split()[0]):
+            aliases.setdefault(key, label)
+    return aliases
+
+
+# Lower-cased label or short form -> canonical label (batch files, API)
+activity_aliases = _aliases(activity_factors)
+activity_aliases["very active"] = "Very Active (hard training/physical job)"
+goal_aliases = _aliases(goals)
+
+Targets = namedtuple("Targets", ["bmr", "maintenance", "target_cals", "protein_target"])
+
+
+def calculate_age(dob: "date", today: "date" = None) -> int:
+    if today is None:
+        # datetime is imported here to keep the package import cheap
+        from datetime import date
+        today = date.today()
+    return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+
+def calc_bmr(gender: str, weight: float, height: float, age: int) -> float:
+    # Mifflin-St Jeor
+    if gender.lower() == "male":
+        return 10 * weight + 6.25 * height - 5 * age + 5
+    else:
+        return 10 * weight + 6.25 * height - 5 * age - 161
+
+
+def daily_targets(gender: str, weight: float, height: float, age: int, goal: str, activity_label: str) -> Targets:
+    bmr = calc_bmr(gender, weight, height, age)
+    maintenance = bmr * activity_factors[activity_label]
+    target_cals = maintenance + goal_calorie_adjustment.get(goal, 0)
+    protein_target = weight * goal_protein_per_kg.get(goal, goal_protein_per_kg[MAINTAIN])
+    return Targets(bmr, maintenance, target_cals, protein_target)
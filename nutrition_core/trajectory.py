@@ -0,0 +1,100 @@
+# trajectory.py
+# Day-by-day body-weight projection for many scenarios at once (activity level
+# x daily calorie adjustment), as one NumPy array computation:
+#   project_weight("Female", 72, 165, 35, *scenario_grid(labels, [-250, -500]), days=365, goal_weight=65)
+# Intake is fixed at the starting target (maintenance + adjustment, as in
+# daily_targets); expenditure is calc_bmr(weight, age that day) x activity
+# factor, so it falls as weight falls and losses slow down. With retarget=True
+# the intake follows maintenance every day instead (a constant deficit).
+# A curve ends (NaN) once it falls below MIN_BMI for the person's height: the
+# energy balance model says nothing useful about starvation-level weights.
+from collections import namedtuple
+from itertools import product
+
+import numpy as np
+
+from .targets import activity_factors, calc_bmr, goal_calorie_adjustment
+
+KCAL_PER_KG = 7700      # energy in 1 kg of body weight change
+MAX_DAYS = 3653         # ten years
+DAYS_PER_YEAR = 365.25
+MIN_BMI = 15.0          # projections stop below this body-mass index
+
+# Daily calorie adjustments compared per goal in the app
+goal_adjustment_options = {goal: sorted({adjustment, adjustment // 2, adjustment * 3 // 2})
+                           for goal, adjustment in goal_calorie_adjustment.items()}
+
+Scenario = namedtuple("Scenario", ["activity", "adjustment"])
+# weights: [scenarios, days + 1] kg (day 0 is today); intake: kcal/day per scenario,
+# or per scenario and day with retarget; goal_day: first day at the goal weight, -1 if never;
+# floor_day: first day below floor_weight(height), from which weights are NaN, -1 if never
+Projection = namedtuple("Projection", ["scenarios", "weights", "intake", "goal_day", "floor_day"])
+
+
+def scenario_grid(activity_labels, adjustments) -> tuple:
+    # Every activity level with every adjustment, as the two parallel lists project_weight takes
+    pairs = list(product(activity_labels, adjustments))
+    return [a for a, _ in pairs], [adj for _, adj in pairs]
+
+
+def floor_weight(height: float) -> float:
+    # Lowest weight (kg) a projection is drawn to, at MIN_BMI for a height in cm
+    return MIN_BMI * (height / 100) ** 2
+
+
+def project_weight(gender: str, weight: float, height: float, age: float, activity_labels, adjustments,
+                   days: int, goal_weight: float = None, retarget: bool = False) -> Projection:
+    days = int(min(max(days, 1), MAX_DAYS))
+    factors = np.array([activity_factors[label] for label in activity_labels], dtype=float)[:, None]
+    adjustments = np.asarray(adjustments, dtype=float)[:, None]
+    if len(factors) != len(adjustments):
+        raise ValueError("activity_labels and adjustments must have the same length")
+
+    # Mifflin-St Jeor is linear in weight: BMR = slope * weight + offset(age), both taken from calc_bmr
+    ages = age + np.arange(days) / DAYS_PER_YEAR
+    offset = calc_bmr(gender, 0.0, height, ages)
+    slope = calc_bmr(gender, 1.0, height, age) - calc_bmr(gender, 0.0, height, age)
+    if retarget:
+        # Intake tracks maintenance, so the balance is the adjustment itself
+        steps = np.broadcast_to(adjustments / KCAL_PER_KG, (len(factors), days))
+        weights = weight + np.concatenate([np.zeros((len(factors), 1)), np.cumsum(steps, axis=1)], axis=1)
+        intake = factors * calc_bmr(gender, weights, height, np.append(ages, age + days / DAYS_PER_YEAR)) \
+            + adjustments
+    else:
+        # w[t+1] = a * w[t] + b[t] with a = 1 - factor * slope / KCAL_PER_KG; solved for all days as
+        # w[t] = a^t * (w[0] + sum_{k<t} b[k] / a^(k+1))
+        intake = factors * calc_bmr(gender, weight, height, age) + adjustments
+        a = 1 - factors * slope / KCAL_PER_KG
+        b = (intake - factors * offset) / KCAL_PER_KG
+        growth = a ** np.arange(days + 1)
+        scaled = np.cumsum(b / growth[:, 1:], axis=1)
+        weights = growth * np.concatenate([np.full((len(factors), 1), float(weight)), weight + scaled], axis=1)
+        intake = intake[:, 0]
+
+    below = weights < floor_weight(height)
+    floor_day = np.where(below.any(axis=1), below.argmax(axis=1), -1)
+    ended = below.cumsum(axis=1) > 0
+    weights[ended] = np.nan
+    if retarget:
+        intake[ended] = np.nan
+
+    goal_day = np.full(len(factors), -1)
+    if goal_weight is not None:
+        reached = weights <= goal_weight if goal_weight <= weight else weights >= goal_weight
+        hit = reached.any(axis=1)
+        goal_day[hit] = reached[hit].argmax(axis=1)
+    scenarios = [Scenario(label, float(adj)) for label, adj in zip(activity_labels, adjustments[:, 0])]
+    return Projection(scenarios, weights, intake, goal_day, floor_day)
+
+
+def subset(projection: Projection, indices) -> Projection:
+    # The given scenarios only, in that order
+    indices = list(indices)
+    return Projection([projection.scenarios[i] for i in indices], projection.weights[indices],
+                      projection.intake[indices], projection.goal_day[indices], projection.floor_day[indices])
+
+
+def goal_dates(projection: Projection, start: "date") -> list:
+    # Date each scenario reaches the goal weight, or None
+    from datetime import timedelta
+    return [start + timedelta(days=int(day)) if day >= 0 else None for day in projection.goal_day.tolist()]
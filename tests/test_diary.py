@@ -0,0 +1,91 @@
+# Incremental daily / rolling-window totals against brute-force sums over the entries
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from nutrition_core.diary import MONTH_DAYS, WEEK_DAYS, FoodDiary
+from nutrition_core.lookup import Catalog
+from nutrition_core.store import NutritionStore
+
+FOODS = ["apple", "egg", "rice", "chicken", "milk"]
+
+
+@pytest.fixture
+def diary(tmp_path):
+    store = NutritionStore(FOODS, ["calories", "protein"],
+                           np.array([[52, 155, 130, 239, 42], [0.3, 13, 2.7, 27, 3.4]]))
+    with FoodDiary(str(tmp_path / "diary.sqlite"), Catalog(store), batch_size=97) as d:
+        yield d
+
+
+def _brute(diary, user):
+    # {day: (calories, protein, entries, week_cal, week_pro, month_cal, month_pro)} from the entries table
+    rows = diary._db.execute("SELECT day, calories, protein FROM entries WHERE user = ?", (user,)).fetchall()
+    per_day = {}
+    for day, cal, pro in rows:
+        d = per_day.setdefault(date.fromisoformat(day), [0.0, 0.0, 0])
+        d[0] += cal
+        d[1] += pro
+        d[2] += 1
+
+    def window(day, n, i):
+        return sum(per_day[d][i] for d in per_day if day - timedelta(days=n - 1) <= d <= day)
+
+    return {d.isoformat(): (cal, pro, n, window(d, WEEK_DAYS, 0), window(d, WEEK_DAYS, 1),
+                            window(d, MONTH_DAYS, 0), window(d, MONTH_DAYS, 1))
+            for d, (cal, pro, n) in per_day.items()}
+
+
+def test_rolling_totals_match_brute_force(diary):
+    rng = random.Random(7)
+    start = date(2026, 1, 1)
+    users = ["a", "b", "c"]
+    # Days logged out of order, in batches of varying size, with some entries removed again
+    for _ in range(3000):
+        day = start + timedelta(days=rng.randrange(120))
+        diary.log(rng.choice(users), rng.choice(FOODS), rng.uniform(10, 400), day)
+    ids = [row[0] for row in diary._db.execute("SELECT id FROM entries").fetchall()]
+    for entry_id in rng.sample(ids, 300):
+        assert diary.remove(entry_id)
+
+    for user in users:
+        expected = _brute(diary, user)
+        history = diary.history(user)
+        assert [t.day for t in history] == sorted(expected)
+        for t in history:
+            assert tuple(t[1:]) == pytest.approx(expected[t.day], abs=1e-6)
+
+
+def test_removing_last_entry_drops_the_day(diary):
+    diary.log("a", "egg", 100, date(2026, 3, 1))
+    diary.log("a", "rice", 200, date(2026, 3, 3))
+    first = diary.entries("a", date(2026, 3, 1))[0]
+    assert diary.remove(first.id)
+    history = diary.history("a")
+    assert [t.day for t in history] == ["2026-03-03"]
+    assert history[0].week_calories == pytest.approx(260)
+
+
+def test_invalid_item_queues_nothing(diary):
+    diary.log("x", "egg", 50)
+    for food, grams, meal in [("egg", 50, {"a": 1}), ("egg", 0, None), ("egg", float("inf"), None),
+                              ("egg", float("nan"), None), ("pizza", 50, None)]:
+        with pytest.raises(ValueError):
+            diary.log_many("y", [("rice", 100), (food, grams)], meal=meal)
+    assert len(diary._pending) == 1
+    assert [e.food for e in diary.entries("x")] == ["egg"]
+    assert diary.entries("y") == []
+
+
+def test_failed_flush_keeps_pending_entries(diary, monkeypatch):
+    diary.log("x", "egg", 50, date(2026, 3, 1))
+    diary.log("y", "rice", 100, date(2026, 3, 1))
+    monkeypatch.setattr(diary, "_apply", lambda *args: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        diary.flush()
+    monkeypatch.undo()
+    assert diary._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 0
+    assert diary.flush() == 2
+    assert [len(diary.entries(u, date(2026, 3, 1))) for u in "xy"] == [1, 1]
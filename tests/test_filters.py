@@ -0,0 +1,40 @@
+# Condition filters agree with the meal planner, with and without nutrient columns
+import numpy as np
+import pytest
+
+from nutrition_core.filters import FoodFilter, condition_mask
+from nutrition_core.plans import MealPlanner
+from nutrition_core.store import NutritionStore
+
+NAMES = ["apple", "bread", "cheese", "burger", "cake", "rice"]
+CATEGORIES = ["fruit", "grain", "dairy", "fast food", "sweets", "grain"]
+
+
+def _store(nutrients, table):
+    return NutritionStore(NAMES, nutrients, np.array(table), text={"category": CATEGORIES})
+
+
+BASIC = _store(["calories", "protein"], [[52, 265, 402, 295, 371, 130], [0.3, 9, 25, 17, 5, 2.7]])
+FULL = _store(["calories", "protein", "carbs", "sugar", "gi", "sodium"],
+              [[52, 265, 402, 295, 371, 130], [0.3, 9, 25, 17, 5, 2.7], [14, 49, 1.3, 24, 53, 28],
+               [10, 5, 0.5, 5, 35, 0.1], [36, 75, 0, 66, 70, 73], [1, 490, 620, 500, 300, 1]])
+
+
+@pytest.mark.parametrize("store", [BASIC, FULL])
+@pytest.mark.parametrize("condition", ["diabetes", "high_bp", "low_bp"])
+def test_filter_matches_planner(store, condition):
+    ids = FoodFilter.from_store(store).query([condition], sort_by=None)
+    planner = MealPlanner(store)
+    assert ids.tolist() == np.flatnonzero(planner.allowed_mask(conditions=[condition])).tolist()
+
+
+def test_fallback_without_nutrients():
+    assert [NAMES[i] for i in np.flatnonzero(condition_mask(BASIC, "diabetes"))] == ["apple", "cheese", "rice"]
+    assert [NAMES[i] for i in np.flatnonzero(condition_mask(BASIC, "high_bp"))] == \
+        ["apple", "bread", "cake", "rice"]
+    assert condition_mask(BASIC, "low_bp").all()
+
+
+def test_unknown_condition():
+    with pytest.raises(KeyError):
+        FoodFilter.from_store(BASIC).query(["gout"])
@@ -0,0 +1,37 @@
+# Amounts the parser must refuse, and typo guesses
+import numpy as np
+import pytest
+
+from nutrition_core.lookup import Catalog
+from nutrition_core.meal_parser import MAX_GRAMS, MealParser
+from nutrition_core.store import NutritionStore
+
+FOODS = ["apple", "beef", "chicken", "egg", "milk", "rice"]
+
+
+@pytest.fixture
+def parser():
+    store = NutritionStore(FOODS, ["calories", "protein"],
+                           np.array([[52, 250, 239, 155, 42, 130], [0.3, 26, 27, 13, 3.4, 2.7]]))
+    return MealParser(Catalog(store))
+
+
+@pytest.mark.parametrize("text", ["0 g rice", "rice 0g", "0 eggs", "1/0 cup milk", "9" * 400 + " g rice",
+                                  f"{MAX_GRAMS + 1} g rice", "20 kg chicken"])
+def test_impossible_amounts_are_unknown(parser, text):
+    estimate = parser.evaluate(text)
+    assert estimate.items == []
+    assert [p.text for p in estimate.unknown] == [text]
+    assert estimate.totals["calories"] == 0
+
+
+def test_amounts_within_bounds(parser):
+    estimate = parser.evaluate(f"2 eggs, {MAX_GRAMS} g rice")
+    assert [(p.food, p.grams) for p in estimate.items] == [("egg", 100), ("rice", MAX_GRAMS)]
+    assert np.isfinite(estimate.totals["calories"])
+
+
+def test_only_long_phrases_are_guessed(parser):
+    estimate = parser.evaluate("a beer, chiken 150g, 2 eggs")
+    assert [(p.food, p.guess) for p in estimate.items] == [("chicken", True), ("egg", False)]
+    assert [p.text for p in estimate.unknown] == ["a beer"]
@@ -0,0 +1,25 @@
+# Per-rerun capture survives reruns that never reach end_rerun
+import sys
+
+from nutrition_core import metrics
+
+
+def test_interrupted_rerun_is_replaced():
+    metrics.begin_rerun(profile="cprofile")
+    with metrics.span("interrupted"):
+        pass
+    # The next run on this thread starts a fresh capture; the old profiler is stopped
+    metrics.begin_rerun()
+    with metrics.span("next"):
+        pass
+    report = metrics.end_rerun()
+    assert [name for name, _ in report.spans] == ["next"]
+    assert metrics._captures == 0 and sys.getprofile() is None
+
+
+def test_end_without_capture_is_harmless():
+    report = metrics.end_rerun()
+    assert report.spans == [] and report.counters == {} and report.profile is None
+    assert metrics._captures == 0
+    if not metrics.enabled():
+        assert metrics.span("idle") is metrics.span("other")
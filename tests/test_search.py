@@ -0,0 +1,23 @@
+# Which queries resolve to a food, and which are only guesses
+import pytest
+
+from nutrition_core.search import FoodSearchIndex
+
+NAMES = ["apple", "beef", "chicken", "egg", "rice", "ice cream", "bread", "beans"]
+
+
+@pytest.fixture
+def index():
+    return FoodSearchIndex(NAMES)
+
+
+@pytest.mark.parametrize("query, name", [("Eggs", "egg"), ("icecream", "ice cream"), ("toast", "bread"),
+                                         ("chiken", "chicken"), ("aple", None), ("beer", None), ("rich", None)])
+def test_resolve(index, query, name):
+    assert index.resolve(query) == name
+
+
+def test_no_guess_between_equally_close_names():
+    index = FoodSearchIndex(["pears", "peaks"])
+    assert index.guess("peacs") is None
+    assert index.guess("pearss") == "pears"
@@ -0,0 +1,57 @@
+# Vectorized weight projection against a plain day-by-day loop
+import numpy as np
+import pytest
+
+from nutrition_core.targets import activity_factors, calc_bmr
+from nutrition_core.trajectory import DAYS_PER_YEAR, KCAL_PER_KG, floor_weight, project_weight, scenario_grid
+
+ACTIVITIES = list(activity_factors)
+ADJUSTMENTS = [-750, -250, 0, 300]
+
+
+def _loop(gender, weight, height, age, label, adjustment, days, retarget):
+    # One scenario, one day at a time: w[t+1] = w[t] + (intake - expenditure on day t) / KCAL_PER_KG
+    factor = activity_factors[label]
+    intake = factor * calc_bmr(gender, weight, height, age) + adjustment
+    weights = [float(weight)]
+    for t in range(days):
+        expenditure = factor * calc_bmr(gender, weights[-1], height, age + t / DAYS_PER_YEAR)
+        if retarget:
+            intake = expenditure + adjustment
+        weights.append(weights[-1] + (intake - expenditure) / KCAL_PER_KG)
+    return np.array(weights)
+
+
+@pytest.mark.parametrize("retarget", [False, True])
+@pytest.mark.parametrize("gender, weight, height, age", [("Female", 72, 165, 35), ("Male", 95, 182, 58)])
+def test_matches_day_by_day_loop(gender, weight, height, age, retarget):
+    days = 730
+    result = project_weight(gender, weight, height, age, *scenario_grid(ACTIVITIES, ADJUSTMENTS), days,
+                            retarget=retarget)
+    assert result.weights.shape == (len(ACTIVITIES) * len(ADJUSTMENTS), days + 1)
+    for scenario, weights in zip(result.scenarios, result.weights):
+        expected = _loop(gender, weight, height, age, scenario.activity, scenario.adjustment, days, retarget)
+        # The curve ends where the loop first drops below the floor
+        below = np.flatnonzero(expected < floor_weight(height))
+        end = below[0] if len(below) else days + 1
+        np.testing.assert_allclose(weights[:end], expected[:end], rtol=0, atol=1e-9)
+        assert np.isnan(weights[end:]).all()
+
+
+def test_goal_day_is_first_day_at_goal():
+    result = project_weight("Female", 72, 165, 35, *scenario_grid(ACTIVITIES, [-500, 0]), 365, goal_weight=68)
+    for weights, day in zip(result.weights, result.goal_day.tolist()):
+        reached = np.flatnonzero(weights <= 68)
+        assert day == (reached[0] if len(reached) else -1)
+
+
+def test_curve_ends_below_floor():
+    label = ACTIVITIES[0]
+    result = project_weight("Female", 50, 160, 30, [label, label], [-500, 0], 3 * 365)
+    floor = floor_weight(160)
+    day = result.floor_day[0]
+    assert 0 < day < 3 * 365
+    assert result.weights[0, day - 1] >= floor and np.isnan(result.weights[0, day:]).all()
+    assert result.floor_day[1] == -1 and not np.isnan(result.weights[1]).any()
+    # Already below the floor: nothing to draw
+    assert project_weight("Female", 30, 160, 30, [label], [-500], 30).floor_day.tolist() == [0]